@@ -41,16 +41,11 @@ https://developer.cisco.com/docs/aci/
 """
 
 import sys
-import json
-import requests
 
-# As we are working on a non-secured environment we can disable
-# security warnings related to self-signed SSL certificate.
-# Don't disable this in your production environment but rather
-# configure your systems properly and secure.
-from urllib3 import disable_warnings
-from urllib3.exceptions import InsecureRequestWarning
-disable_warnings(InsecureRequestWarning)
+# The login itself is implemented by the ApicClient class inside the
+# apic_client.py script, which keeps the token cached and re-uses one
+# pooled HTTP session for all following requests.
+from apic_client import get_client
 
 
 def get_aci_token():
@@ -58,71 +53,18 @@ def get_aci_token():
     Function will authenticate to the Cisco sandbox APIC via the
     REST API and returns authentication token which will be used
     in future interacion with APIC API.
-    """
-
-    # APIC API URI - with JSON encoding
-    APIC_URL = "https://sandboxapicdc.cisco.com/api/aaaLogin.json"
-
-    # Storing passwords inside your scripts is not recommended but for the demo
-    # purposes it is the easiest way.
-    # One recommended way is to export your credentials as an environment variables
-    # and then use these variables in your script.
-    #
-    # Example:
-    # import os
-    # PASSWORD = os.getenv('MY_SECURE_PASSWORD')
-    #
-    # Here the environment variable is called 'MY_SECURE_PASSWORD' which
-    # contains your secret password.
-    USERNAME = "admin"
-    PASSWORD = "ciscopsdt"
-
-    # Prepare the headers for the HTTP POST message
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept':       'application/json'
-    }
-
-    # Prepare the payload for the HTTP POST message
-    # APIC API expects the JSON-Encoded data which means
-    # we need to convert the payload dictionary into a
-    # JSON string. To do this, we can use "json" argument
-    # inside the requests.post() function or use the "data"
-    # argument like this: requests.post(data=json.dumps(payload))
-    payload = {
-        "aaaUser": {
-            "attributes": {
-                "name": USERNAME,
-                "pwd": PASSWORD
-            }
-        }
-    }
 
-    # Create the HTTP POST request
-    # NOTE: verify=False is Not recommended TO USE in a production environment
-    response = requests.post(
-        url=APIC_URL,
-        json=payload,   # or data=json.dumps(payload)
-        headers=headers,
-        verify=False
-    )
+    The token is taken from the shared APIC client, so a new login
+    to the APIC is done only when there is no valid cached token.
+    """
+    return get_client().token
 
-    # Raise an exception if the response is not OK
-    if not response.ok:
-        print(json.dumps(response.json(), indent=4))
-        response.raise_for_status()
 
-    # Convert the response message into a JSON datastructure
-    response_json = response.json()
+if __name__ == "__main__":
 
-    # Check if the token is present in the message
     try:
-        token = response_json['imdata'][0]['aaaLogin']['attributes']['token']
-    except KeyError:
-        print('Token is not present in the response message!')
-        # print the response and check manually where is the problem
-        print(json.dumps(response_json, indent=4))
+        print(get_aci_token())
+    except ValueError as error:
+        print(error)
         # exit with error code 1
         sys.exit(1)
-
-    return token
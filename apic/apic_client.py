@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+"""
+APIC client with a persistent, pooled HTTP session.
+
+The apic_auth.py script shows how to get a token via the /api/aaaLogin
+resource. Doing that before every API call is expensive:
+  - each login is a new POST towards the APIC AAA subsystem
+  - each requests.post()/requests.get() call opens a brand new TCP and TLS
+    connection which is closed right after the response is received
+
+The ApicClient class below keeps one requests.Session() object with a
+keep-alive connection pool, so the TCP/TLS connection is opened once and
+reused for every following request.
+The token is cached together with its lifetime. The APIC returns the
+following attributes inside the aaaLogin response:
+    "refreshTimeoutSeconds": "600"     - token idle timeout
+    "maximumLifetimeSeconds": "86400"  - absolute token lifetime
+
+Before the refresh timeout expires the token is refreshed via the
+/api/aaaRefresh.json resource (HTTP GET with the current token as a cookie)
+instead of doing a full login again. A full login is done only when there
+is no token yet, when the maximum lifetime is reached or when the APIC
+answers with HTTP 401/403.
+
+All APIC scripts should use the shared client returned by get_client():
+
+    from apic_client import get_client
+    client = get_client()
+    response_json = client.get('/api/node/class/fvTenant.json')
+    print(client.stats)
+
+APIC Sanbox can be found here:
+https://sandboxapicdc.cisco.com/
+
+ACI Programmability documentation:
+https://developer.cisco.com/docs/aci/
+"""
+
+import json
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# As we are working on a non-secured environment we can disable
+# security warnings related to self-signed SSL certificate.
+# Don't disable this in your production environment but rather
+# configure your systems properly and secure.
+from urllib3 import disable_warnings
+from urllib3.exceptions import InsecureRequestWarning
+disable_warnings(InsecureRequestWarning)
+
+
+# APIC Sandbox base URL
+APIC_URL = "https://sandboxapicdc.cisco.com"
+
+# Storing passwords inside your scripts is not recommended but for the demo
+# purposes it is the easiest way.
+# One recommended way is to export your credentials as an environment variables
+# and then use these variables in your script.
+#
+# Example:
+# import os
+# PASSWORD = os.getenv('MY_SECURE_PASSWORD')
+#
+# Here the environment variable is called 'MY_SECURE_PASSWORD' which
+# contains your secret password.
+USERNAME = "admin"
+PASSWORD = "ciscopsdt"
+
+# Refresh the token this many seconds before it would time out
+REFRESH_MARGIN = 60
+
+
+class ApicClient:
+    """
+    APIC REST API client which owns a pooled keep-alive session and
+    a cached authentication token.
+    The client is thread safe, so one instance can be shared by
+    concurrent workers.
+    """
+
+    def __init__(self, base_url=APIC_URL, username=USERNAME, password=PASSWORD,
+                 pool_size=10, verify=False):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.verify = verify
+
+        # One session = one connection pool. pool_maxsize defines how many
+        # connections towards the APIC are kept open for re-use.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Accept':       'application/json'
+        })
+
+        self._adapter = adapter
+        self._lock = threading.Lock()
+        self._token = None
+        self._token_created = 0.0
+        self._token_refreshed = 0.0
+        self._refresh_timeout = 0
+        self._max_lifetime = 0
+
+        # Counters used to see how much work the client saved
+        self._counters = {
+            'logins': 0,
+            'refreshes': 0,
+            'requests': 0,
+            'token_reuses': 0,
+        }
+
+    def _store_token(self, attributes):
+        """
+        Store the token and its lifetime from the aaaLogin attributes.
+        """
+        now = time.monotonic()
+        self._token = attributes['token']
+        self._token_refreshed = now
+        self._refresh_timeout = int(attributes.get('refreshTimeoutSeconds', 600))
+        self._max_lifetime = int(attributes.get('maximumLifetimeSeconds', 86400))
+        self.session.cookies.set('APIC-cookie', self._token)
+
+    def _post_login(self, path, **kwargs):
+        """
+        Send the aaaLogin/aaaRefresh request and return the aaaLogin
+        attributes from the response. Raise ValueError if the response
+        doesn't contain the token.
+        """
+        response = self.session.request(
+            url=self.base_url + path,
+            verify=self.verify,
+            **kwargs
+        )
+
+        # Raise an exception if the response is not OK
+        if not response.ok:
+            print(response.text)
+            response.raise_for_status()
+
+        response_json = response.json()
+
+        # Check if the token is present in the message
+        try:
+            return response_json['imdata'][0]['aaaLogin']['attributes']
+        except (KeyError, IndexError):
+            # print the response and check manually where is the problem
+            print(json.dumps(response_json, indent=4))
+            raise ValueError('Token is not present in the response message!')
+
+    def login(self):
+        """
+        Authenticate via the /api/aaaLogin.json resource with the
+        username and password.
+        """
+        payload = {
+            "aaaUser": {
+                "attributes": {
+                    "name": self.username,
+                    "pwd": self.password
+                }
+            }
+        }
+        # NOTE: verify=False is Not recommended TO USE in a production environment
+        attributes = self._post_login(
+            '/api/aaaLogin.json', method='POST', json=payload
+        )
+        self._store_token(attributes)
+        self._token_created = self._token_refreshed
+        self._counters['logins'] += 1
+
+    def refresh(self):
+        """
+        Refresh the current token via the /api/aaaRefresh.json resource.
+        The current token is sent as the APIC-cookie.
+        """
+        attributes = self._post_login('/api/aaaRefresh.json', method='GET')
+        self._store_token(attributes)
+        self._counters['refreshes'] += 1
+
+    def _ensure_token(self):
+        """
+        Make sure a valid token is cached. Refresh it when it is close to
+        the refresh timeout, login again when the maximum lifetime is
+        reached.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._token is None:
+                self.login()
+            elif now - self._token_created >= self._max_lifetime - REFRESH_MARGIN:
+                self.login()
+            elif now - self._token_refreshed >= self._refresh_timeout - REFRESH_MARGIN:
+                self.refresh()
+            else:
+                self._counters['token_reuses'] += 1
+            return self._token
+
+    @property
+    def token(self):
+        """
+        Valid APIC authentication token.
+        """
+        return self._ensure_token()
+
+    def request(self, method, path, **kwargs):
+        """
+        Make an authenticated HTTP request and return the response object.
+        If the token was invalidated on the APIC side (HTTP 401/403),
+        login again and repeat the request once.
+        """
+        url = path if path.startswith('http') else self.base_url + path
+        kwargs.setdefault('verify', self.verify)
+
+        token = self._ensure_token()
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code in (401, 403):
+            with self._lock:
+                # Only the first of the concurrent requests rejected with
+                # the same token logs in, the others use its new token
+                if self._token == token:
+                    self.login()
+            response = self.session.request(method, url, **kwargs)
+
+        with self._lock:
+            self._counters['requests'] += 1
+        return response
+
+    def get(self, path, **kwargs):
+        """
+        HTTP GET the APIC resource and return the JSON data.
+        """
+        response = self.request('GET', path, **kwargs)
+
+        # Raise an exception if the response is not OK
+        if not response.ok:
+            print(response.text)
+            response.raise_for_status()
+
+        return response.json()
+
+    def connections_opened(self):
+        """
+        Number of TCP/TLS connections opened by the connection pool.
+        """
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    @property
+    def stats(self):
+        """
+        Dictionary with the logins saved and handshakes avoided counters.
+        Every request or refresh done without a new aaaLogin is a saved
+        login and every request which re-used a pooled connection is an
+        avoided TCP/TLS handshake.
+        """
+        counters = dict(self._counters)
+        total_calls = counters['requests'] + counters['logins'] + counters['refreshes']
+        counters['connections_opened'] = self.connections_opened()
+        counters['logins_saved'] = max(counters['requests'] - counters['logins'], 0)
+        counters['handshakes_avoided'] = max(
+            total_calls - counters['connections_opened'], 0
+        )
+        return counters
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
+
+
+def class_path(mo_class):
+    """
+    Return the APIC class query resource for the given MO class,
+    e.g. fvTenant -> /api/node/class/fvTenant.json
+    """
+    return f"/api/node/class/{mo_class}.json"
+
+
+# Shared client instance used by all APIC scripts
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the shared ApicClient instance, create it on the first call.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApicClient()
+        return _client
+
+
+if __name__ == "__main__":
+
+    client = get_client()
+
+    # Two requests, but only one login and one TLS handshake
+    tenants = client.get('/api/node/class/fvTenant.json')
+    devices = client.get('/api/node/class/topology/pod-1/topSystem.json')
+
+    print(f"Tenants: {tenants['totalCount']}, devices: {devices['totalCount']}")
+    print(json.dumps(client.stats, indent=4))
@@ -8,7 +8,7 @@ The APIC REST API resource points to all the fabric tenants:
 /api/node/class/fvTenant.json
 
 For the authentication we need to use the authentication token
-which can be obtained via the "apic_auth.py" script.
+which is obtained and cached by the "apic_client.py" script.
 Once the token is available, it has to be encoded inside the
 "Cookie" header field with value set to "APIC-Cookie=<token>".
 
@@ -47,50 +47,26 @@ https://developer.cisco.com/docs/aci/
 """
 
 import json
-import requests
 
-# As we are working on a non-secured environment we can disable
-# security warnings related to self-signed SSL certificate.
-# Don't disable this in your production environment but rather
-# configure your systems properly and secure.
-from urllib3 import disable_warnings
-from urllib3.exceptions import InsecureRequestWarning
-disable_warnings(InsecureRequestWarning)
-
-# import the local function get_aci_token() from the apic_auth.py script
-from apic_auth import get_aci_token
+# import the shared APIC client from the apic_client.py script.
+# The client keeps the authentication token and a pooled keep-alive
+# HTTP session, so no extra login or TLS handshake is needed here.
+from apic_client import get_client
 
 
 if __name__ == "__main__":
 
-    # APIC API URI - with JSON encoding
+    # APIC API resource - with JSON encoding
     # XML encoding can be used as well
-    APIC_URL = "https://sandboxapicdc.cisco.com/api/node/class/fvTenant.json"
-
-    # Get the token by calling the get_aci_token() function
-    token = get_aci_token()
-
-    # Prepare the headers for the HTTP GET message
-    # with the token included inside the "Cookie".
-    headers = {
-        'Content-Type': 'application/json',
-        'Cookie': 'APIC-cookie=' + token,
-    }
-
-    # Make the HTTP GET request to get all tenants
-    response = requests.get(
-        url=APIC_URL,
-        headers=headers,
-        verify=False
-    )
+    APIC_PATH = "/api/node/class/fvTenant.json"
 
-    # Raise an exception if the response is not OK
-    if not response.ok:
-        print(json.dumps(response.json(), indent=4))
-        response.raise_for_status()
+    # Get the shared client, it will login to the APIC if needed
+    client = get_client()
 
-    # Convert the response message into a JSON datastructure
-    response_json = response.json()
+    # Make the HTTP GET request to get all tenants.
+    # The token is sent as the "APIC-cookie" cookie by the client session.
+    # An exception is raised if the response is not OK.
+    response_json = client.get(APIC_PATH)
 
     # Print the message
     print(json.dumps(response_json, indent=4))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""
+This script will retrieve a snapshot of the APIC fabric inventory by
+querying several MO (Managed Object) classes at the same time.
+
+The apic_get_devices.py and apic_get_tenants.py scripts query just one
+class each (topSystem, fvTenant) and one after the other. Here all the
+class queries are sent concurrently by a pool of worker threads which share
+one authenticated APIC client (see apic_client.py), so the snapshot takes
+the time of a few class queries instead of the sum of all of them - the
+classes are queried in rounds of at most "per host" queries, e.g. the 6
+default classes with the default cap of 4 take about two query times.
+
+Each class is queried via the class query resource:
+/api/node/class/<class>.json
+
+The number of worker threads is configurable and the number of parallel
+requests towards one APIC host is capped with a semaphore, so the APIC is
+not overloaded by a long list of classes.
+
+Example of returned data:
+{
+    "classes": {
+        "fvTenant": {
+            "totalCount": "1",
+            "seconds": 0.215,
+            "imdata": [
+                {
+                    "fvTenant": {
+                        "attributes": {
+                            "dn": "uni/tn-Shore-Test-1",
+                            ...
+                        }
+                    }
+                }
+            ]
+        },
+        "topSystem": {
+            ...
+        }
+    },
+    "seconds": 0.298
+}
+
+Usage:
+    python apic_inventory.py
+    python apic_inventory.py --workers 8 --per-host 4 fvTenant fvBD fvCtx
+
+APIC Sanbox can be found here:
+https://sandboxapicdc.cisco.com/
+
+ACI Programmability documentation:
+https://developer.cisco.com/docs/aci/
+"""
+
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+# import the shared APIC client from the apic_client.py script
+from apic_client import get_client, class_path
+
+
+# MO classes which make up the default fabric snapshot
+DEFAULT_CLASSES = [
+    'topSystem',    # fabric nodes (controllers, spines, leafs)
+    'fvTenant',     # tenants
+    'fvAEPg',       # end point groups
+    'fvBD',         # bridge domains
+    'fvCtx',        # VRFs
+    'l1PhysIf',     # physical interfaces
+]
+
+# Per-host semaphores which cap the number of parallel requests, one for
+# every APIC host shared by all the calls
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def _host_semaphore(host, limit):
+    """
+    Return the semaphore for the given APIC host, create it if needed.
+    Raise ValueError if the host already has a different limit, two
+    semaphores would let both limits run at the same time.
+    """
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = (limit, threading.BoundedSemaphore(limit))
+        host_limit, semaphore = _host_limits[host]
+        if host_limit != limit:
+            raise ValueError(f'{host} already has the per host limit {host_limit}, '
+                             f'not {limit}')
+        return semaphore
+
+
+def fetch_class(client, mo_class, per_host=4):
+    """
+    Query one MO class and return the response data with the query time.
+    """
+    semaphore = _host_semaphore(urlparse(client.base_url).netloc, per_host)
+    with semaphore:
+        start = time.perf_counter()
+        response_json = client.get(class_path(mo_class))
+        response_json['seconds'] = round(time.perf_counter() - start, 3)
+    return response_json
+
+
+def fetch_inventory(classes=None, client=None, workers=8, per_host=4):
+    """
+    Query all the MO classes concurrently and return one merged result
+    with the data of each class stored under the "classes" key.
+    """
+    classes = classes or DEFAULT_CLASSES
+    client = client or get_client()
+
+    # Login once before the workers start, so they all share one token
+    # instead of racing for the first login.
+    client.token
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            mo_class: executor.submit(fetch_class, client, mo_class, per_host)
+            for mo_class in classes
+        }
+        # result() re-raises an exception from the worker thread
+        inventory = {
+            'classes': {
+                mo_class: future.result() for mo_class, future in futures.items()
+            }
+        }
+    inventory['seconds'] = round(time.perf_counter() - start, 3)
+    return inventory
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Concurrent multi-class APIC inventory snapshot'
+    )
+    parser.add_argument('classes', nargs='*', default=DEFAULT_CLASSES,
+                        help='MO classes to query')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='number of worker threads')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='max. parallel requests towards one APIC host')
+    args = parser.parse_args()
+
+    inventory = fetch_inventory(
+        classes=args.classes,
+        workers=args.workers,
+        per_host=args.per_host
+    )
+
+    # Print the merged inventory
+    print(json.dumps(inventory, indent=4))
+
+    # Print a short summary with the time of each class query
+    for mo_class, data in inventory['classes'].items():
+        print(f"{mo_class}: {data['totalCount']} objects in {data['seconds']}s")
+    print(f"Snapshot done in {inventory['seconds']}s")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+Compact columnar in-memory store for the APIC MO attributes.
+
+Every topSystem record printed by apic_get_devices.py is a dictionary with
+about 50 string attributes and most of the values are repeated in every
+record ("0.0.0.0", "unspecified", "::", "local", ...). With tens of
+thousands of MOs the list-of-dicts representation wastes a lot of memory:
+every object has its own dictionary with its own keys and values.
+
+The MoStore class below keeps the data of each MO class in columns:
+  - every attribute value is interned, stored just once in a value pool
+    and referenced by its integer ID
+  - every attribute is one column, an array of value IDs (4 bytes per MO)
+    built with the standard array module
+  - the "dn" of each MO is unique, so it's not interned - the dn list
+    holds the dn of every row and the dn index points to the row number
+
+Example of the layout for the fvTenant class:
+    values:   ["common", "local", "mgmt", ...]
+    dns:      ["uni/tn-common", "uni/tn-mgmt"]
+    dn index: {"uni/tn-common": 0, "uni/tn-mgmt": 1}
+    columns:  {"name":  array('I', [1, 3]),
+               "lcOwn": array('I', [2, 2])}
+
+Lookup by dn is one dictionary lookup and the attribute filter compares
+the integer value IDs instead of the strings.
+
+Usage:
+    python apic_store.py
+    python apic_store.py topSystem l1PhysIf
+
+APIC Sanbox can be found here:
+https://sandboxapicdc.cisco.com/
+
+ACI Programmability documentation:
+https://developer.cisco.com/docs/aci/
+"""
+
+import sys
+import json
+import argparse
+from array import array
+
+# import the paged class query generator from the apic_stream.py script
+from apic_stream import iter_class
+
+
+def _deep_sizeof(obj, seen=None):
+    """
+    Return the size of the object in bytes including all referenced
+    dictionaries, lists and strings. Every object is counted only once.
+    """
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += _deep_sizeof(item, seen)
+    return size
+
+
+class _ClassTable:
+    """
+    Columns of one MO class.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.dns = []
+        self.dn_index = {}
+        self.columns = {}
+
+
+class MoStore:
+    """
+    Columnar store of the APIC MOs with interned attribute values.
+    """
+
+    # Value ID of an attribute which is not present in the MO
+    MISSING = 0
+
+    def __init__(self):
+        self._values = [None]
+        self._value_ids = {}
+        self._tables = {}
+
+    def _intern(self, value):
+        """
+        Return the ID of the value, add it to the value pool if needed.
+        """
+        value_id = self._value_ids.get(value)
+        if value_id is None:
+            value_id = len(self._values)
+            self._values.append(value)
+            self._value_ids[value] = value_id
+        return value_id
+
+    def add(self, mo_class, attributes):
+        """
+        Add one MO or replace the attributes of an existing MO.
+        """
+        table = self._tables.setdefault(mo_class, _ClassTable())
+        dn = attributes['dn']
+        row = table.dn_index.get(dn)
+        if row is None:
+            row = table.rows
+            table.rows += 1
+            table.dns.append(dn)
+            table.dn_index[dn] = row
+            for column in table.columns.values():
+                column.append(self.MISSING)
+
+        for key, value in attributes.items():
+            if key == 'dn':
+                continue
+            column = table.columns.get(key)
+            if column is None:
+                column = table.columns[key] = array('I', [self.MISSING]) * table.rows
+            column[row] = self._intern(value)
+
+    def load(self, imdata):
+        """
+        Add all the MOs from the "imdata" list or from any iterable of
+        {class: {"attributes": {...}}} objects, e.g. the iter_class()
+        generator. Return the number of loaded MOs.
+        """
+        count = 0
+        for mo in imdata:
+            for mo_class, data in mo.items():
+                self.add(mo_class, data['attributes'])
+                count += 1
+        return count
+
+    def _row(self, table, row):
+        """
+        Build the attributes dictionary of one row.
+        """
+        attributes = {'dn': table.dns[row]}
+        attributes.update(
+            (key, self._values[column[row]])
+            for key, column in table.columns.items()
+            if column[row] != self.MISSING
+        )
+        return attributes
+
+    def get(self, mo_class, dn):
+        """
+        Return the attributes of the MO with the given dn or None.
+        """
+        table = self._tables.get(mo_class)
+        if table is None or dn not in table.dn_index:
+            return None
+        return self._row(table, table.dn_index[dn])
+
+    def filter(self, mo_class, **attributes):
+        """
+        Generator which yields the attributes of all the MOs which match
+        all the given attribute values, e.g.
+            store.filter('topSystem', role='leaf', state='in-service')
+        """
+        table = self._tables.get(mo_class)
+        if table is None:
+            return
+        if 'dn' in attributes:
+            # The dn is not interned, it's looked up in the dn index
+            attributes = dict(attributes)
+            mo = self.get(mo_class, attributes.pop('dn'))
+            if mo and all(mo.get(key) == value for key, value in attributes.items()):
+                yield mo
+            return
+
+        # Translate the values into IDs, a value which is not in the pool
+        # can't match any MO.
+        wanted = []
+        for key, value in attributes.items():
+            if key not in table.columns or value not in self._value_ids:
+                return
+            wanted.append((table.columns[key], self._value_ids[value]))
+
+        for row in range(table.rows):
+            if all(column[row] == value_id for column, value_id in wanted):
+                yield self._row(table, row)
+
+    def classes(self):
+        """
+        Return the number of stored MOs of each class.
+        """
+        return {mo_class: table.rows for mo_class, table in self._tables.items()}
+
+    def __len__(self):
+        return sum(table.rows for table in self._tables.values())
+
+    def memory_usage(self):
+        """
+        Return the memory used by the store in bytes.
+        """
+        # One "seen" set for everything, so the strings referenced from
+        # several places are counted once
+        seen = set()
+        size = _deep_sizeof(self._values, seen) + sys.getsizeof(self._value_ids)
+        for table in self._tables.values():
+            size += _deep_sizeof(table.dns, seen) + _deep_sizeof(table.dn_index, seen)
+            size += sys.getsizeof(table.columns)
+            size += sum(sys.getsizeof(column) for column in table.columns.values())
+        return size
+
+    def memory_report(self, imdata=None):
+        """
+        Compare the memory used by the store with the plain list-of-dicts
+        representation. If the original "imdata" list is not given,
+        it's rebuilt from the store and parsed again from JSON, so the
+        strings are not shared with the value pool, the same as in a
+        parsed APIC response.
+        """
+        if imdata is None:
+            imdata = json.loads(json.dumps([
+                {mo_class: {'attributes': self._row(table, row)}}
+                for mo_class, table in self._tables.items()
+                for row in range(table.rows)
+            ]))
+        store_bytes = self.memory_usage()
+        dicts_bytes = _deep_sizeof(imdata)
+        return {
+            'objects': len(self),
+            'unique_values': len(self._values) - 1,
+            'store_bytes': store_bytes,
+            'list_of_dicts_bytes': dicts_bytes,
+            'ratio': round(dicts_bytes / store_bytes, 2) if store_bytes else None,
+        }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Load APIC MO classes into the columnar store'
+    )
+    parser.add_argument('classes', nargs='*', default=['topSystem'],
+                        help='MO classes to load')
+    args = parser.parse_args()
+
+    store = MoStore()
+    for mo_class in args.classes:
+        store.load(iter_class(mo_class))
+
+    print(json.dumps(store.classes(), indent=4))
+    print(json.dumps(store.memory_report(), indent=4))
+
+    # Example of the attribute filter
+    for node in store.filter('topSystem', role='leaf'):
+        print(node['dn'], node.get('address'))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+This script will stream all objects of an APIC MO class page by page.
+
+The apic_get_devices.py and apic_get_tenants.py scripts read the whole
+"imdata" array with response.json() and then print it with json.dumps().
+For a large fabric, a class query can return 100k l1PhysIf or fvCEp
+objects which are then held in memory twice.
+
+The APIC class query supports server-side paging with the query parameters:
+    page       - page number, starting with 0
+    page-size  - number of objects in one page
+
+Example:
+/api/node/class/l1PhysIf.json?page=0&page-size=1000&order-by=l1PhysIf.dn
+
+The order-by parameter keeps the order of objects stable between the pages.
+
+The iter_class() generator requests one page at a time and yields the
+objects one by one, so only one page is kept in memory no matter how large
+the fabric is. The output is printed as NDJSON (newline delimited JSON),
+one object per line, so it can be processed line by line as well:
+
+{"l1PhysIf": {"attributes": {"dn": "topology/pod-1/node-101/sys/phys-[eth1/1]", ...}}}
+{"l1PhysIf": {"attributes": {"dn": "topology/pod-1/node-101/sys/phys-[eth1/2]", ...}}}
+
+Usage:
+    python apic_stream.py l1PhysIf
+    python apic_stream.py fvCEp --page-size 500 > endpoints.ndjson
+
+APIC Sanbox can be found here:
+https://sandboxapicdc.cisco.com/
+
+ACI Programmability documentation:
+https://developer.cisco.com/docs/aci/
+"""
+
+import sys
+import json
+import argparse
+
+# import the shared APIC client from the apic_client.py script
+from apic_client import get_client, class_path
+
+
+def iter_pages(mo_class, client=None, page_size=1000, params=None):
+    """
+    Generator which yields the "imdata" list of each page of the
+    class query until the last page is reached.
+    """
+    client = client or get_client()
+    params = dict(params or {})
+    params.setdefault('order-by', f'{mo_class}.dn')
+    params['page-size'] = page_size
+
+    page = 0
+    while True:
+        params['page'] = page
+        imdata = client.get(class_path(mo_class), params=params)['imdata']
+        if imdata:
+            yield imdata
+
+        # The last page is shorter than the page size
+        if len(imdata) < page_size:
+            break
+        page += 1
+
+
+def iter_class(mo_class, client=None, page_size=1000, params=None):
+    """
+    Generator which yields the MO class objects one by one.
+    """
+    for imdata in iter_pages(mo_class, client, page_size, params):
+        yield from imdata
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Stream all objects of an APIC class as NDJSON'
+    )
+    parser.add_argument('mo_class', help='MO class to query, e.g. l1PhysIf')
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help='number of objects requested in one page')
+    args = parser.parse_args()
+
+    # Print one object per line as soon as its page is received
+    count = 0
+    for mo in iter_class(args.mo_class, page_size=args.page_size):
+        sys.stdout.write(json.dumps(mo) + '\n')
+        count += 1
+
+    print(f'{count} {args.mo_class} objects streamed', file=sys.stderr)
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+
+"""
+This script will subscribe to changes of APIC MO classes via the APIC
+event WebSocket instead of re-reading all the objects every minute.
+
+Re-running apic_get_devices.py downloads every topSystem attribute again,
+even if nothing has changed. The APIC supports query subscriptions:
+
+STEP1:
+Open the WebSocket with the authentication token appended to the URL:
+    wss://<apic>/socket<token>
+
+STEP2:
+Send the class query with the subscription=yes parameter:
+    GET /api/node/class/topSystem.json?subscription=yes
+The response contains the current objects (used to build the local model)
+and the "subscriptionId" value.
+
+STEP3:
+Every change of a subscribed object is pushed over the WebSocket as:
+{
+    "subscriptionId": ["72057611234574337"],
+    "imdata": [
+        {
+            "fvTenant": {
+                "attributes": {
+                    "dn": "uni/tn-Tenant1",
+                    "descr": "new description",
+                    "status": "modified",
+                    ...
+                }
+            }
+        }
+    ]
+}
+The "status" attribute is one of created, modified or deleted and only the
+changed attributes are sent for the modified objects.
+
+STEP4:
+A subscription times out after 60 seconds (or after the refresh-timeout
+query parameter value) unless it is refreshed via:
+    GET /api/subscriptionRefresh.json?id=<subscriptionId>
+
+The ApicSubscriber class below does all the steps. The incoming deltas are
+applied to the local in-memory model and the consumers get change events
+instead of the full objects.
+
+The WebSocket URL is derived from the base URL of the APIC client, so the
+subscriber can be pointed to a local fake APIC server (ws:// instead of
+wss://) for testing, e.g. the FakeApic from mock/mock_apic_ws.py:
+    apic = FakeApic().start()
+    client = ApicClient(base_url=apic.url)
+    subscriber = ApicSubscriber(['fvTenant'], client=client)
+
+If a subscription can't be refreshed (it timed out or the APIC couldn't be
+reached), the class is subscribed again on the next refresh. The new
+snapshot is compared with the local model, so the consumers get the events
+of all the changes made in the meantime as well.
+
+If the WebSocket is closed (e.g. a network outage or an APIC restart), it's
+opened again with a growing delay (1 s doubled up to 60 s) and with the
+token the client has at that time, as the client may have logged in again
+in the meantime. The subscriptions belong to the closed WebSocket, so all
+the classes are subscribed again and compared with the model the same way.
+
+Usage:
+    python apic_subscribe.py
+    python apic_subscribe.py topSystem fvTenant fvBD
+
+The WebSocket client library has to be installed:
+    pip install websocket-client
+
+APIC Sanbox can be found here:
+https://sandboxapicdc.cisco.com/
+
+ACI Programmability documentation:
+https://developer.cisco.com/docs/aci/
+"""
+
+import ssl
+import json
+import queue
+import argparse
+import threading
+from urllib.parse import urlparse
+
+import requests
+import websocket
+
+# import the shared APIC client from the apic_client.py script
+from apic_client import get_client, class_path
+
+
+class ApicSubscriber:
+    """
+    Subscribe to APIC MO classes and keep a local model of the objects
+    in sync with the change events pushed via the APIC WebSocket.
+    """
+
+    def __init__(self, classes, client=None, refresh_timeout=60,
+                 refresh_interval=30, max_reconnect_delay=60):
+        self.classes = list(classes)
+        self.client = client or get_client()
+        self.refresh_timeout = refresh_timeout
+        self.refresh_interval = refresh_interval
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # Local model: {class: {dn: {attribute: value}}}
+        self.model = {mo_class: {} for mo_class in self.classes}
+
+        # Active subscriptions: {subscriptionId: class}
+        self.subscriptions = {}
+
+        # Classes which have to be subscribed again
+        self._lost = set()
+        # Events found by comparing a new snapshot with the model
+        self._resync_events = queue.Queue()
+        self.refresh_errors = 0
+        self.reconnects = 0
+        self.last_error = None
+
+        self._ws = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def _ws_url(self):
+        """
+        Return the WebSocket URL: wss://<apic>/socket<token>
+        """
+        url = urlparse(self.client.base_url)
+        scheme = 'wss' if url.scheme == 'https' else 'ws'
+        return f'{scheme}://{url.netloc}/socket{self.client.token}'
+
+    def _query(self, mo_class):
+        """
+        Send the class query with subscription=yes and return the
+        subscription ID and the objects {dn: attributes}.
+        """
+        response_json = self.client.get(
+            class_path(mo_class),
+            params={
+                'subscription': 'yes',
+                'refresh-timeout': self.refresh_timeout
+            }
+        )
+        objects = {}
+        for mo in response_json['imdata']:
+            attributes = mo[mo_class]['attributes']
+            attributes.pop('status', None)
+            objects[attributes['dn']] = attributes
+        return response_json['subscriptionId'], objects
+
+    def _subscribe(self, mo_class):
+        """
+        Subscribe to the class, load the returned objects into the model
+        and store the subscription ID.
+        """
+        subscription_id, objects = self._query(mo_class)
+        with self._lock:
+            self.model[mo_class] = objects
+            self.subscriptions[subscription_id] = mo_class
+
+    def _resubscribe(self, mo_class):
+        """
+        Subscribe to the class again and apply the difference between the
+        new snapshot and the model, so no change is lost.
+        """
+        subscription_id, objects = self._query(mo_class)
+        with self._lock:
+            self.subscriptions[subscription_id] = mo_class
+            known = set(self.model.get(mo_class, {}))
+
+        for attributes in objects.values():
+            event = self.apply(mo_class, attributes)
+            if event:
+                self._resync_events.put(event)
+        for dn in known - set(objects):
+            event = self.apply(mo_class, {'dn': dn, 'status': 'deleted'})
+            if event:
+                self._resync_events.put(event)
+
+    def _refresh_error(self, error):
+        with self._lock:
+            self.refresh_errors += 1
+            self.last_error = error
+
+    def _refresh(self):
+        """
+        Refresh all subscriptions and subscribe again to the classes whose
+        subscription couldn't be refreshed.
+        """
+        with self._lock:
+            subscriptions = list(self.subscriptions.items())
+        for subscription_id, mo_class in subscriptions:
+            try:
+                refreshed = self.client.request(
+                    'GET', '/api/subscriptionRefresh.json',
+                    params={'id': subscription_id}
+                ).ok
+            except requests.RequestException as error:
+                self._refresh_error(error)
+                refreshed = False
+            if not refreshed:
+                with self._lock:
+                    self.subscriptions.pop(subscription_id, None)
+                    self._lost.add(mo_class)
+
+        self._resubscribe_lost()
+
+    def _resubscribe_lost(self):
+        """
+        Subscribe again to the classes whose subscription was lost.
+        A class which fails is tried again on the next refresh.
+        """
+        with self._lock:
+            lost = list(self._lost)
+        for mo_class in lost:
+            try:
+                self._resubscribe(mo_class)
+            except (requests.RequestException, KeyError, ValueError) as error:
+                # Try again on the next refresh
+                self._refresh_error(error)
+                continue
+            with self._lock:
+                self._lost.discard(mo_class)
+
+    def _refresh_loop(self):
+        """
+        Refresh all subscriptions before they time out. An error doesn't
+        stop the loop, the refresh is repeated after the next interval.
+        """
+        while not self._stop.wait(self.refresh_interval):
+            self._refresh()
+
+    def _connect(self):
+        """
+        Open the WebSocket with the current token of the client.
+        """
+        token = self.client.token
+        # NOTE: CERT_NONE is Not recommended TO USE in a production environment
+        self._ws = websocket.create_connection(
+            self._ws_url(),
+            sslopt={'cert_reqs': ssl.CERT_NONE},
+            cookie=f'APIC-cookie={token}'
+        )
+        # Wake up regularly to check if the subscriber was stopped
+        self._ws.settimeout(1)
+
+    def _reconnect(self):
+        """
+        Open the closed WebSocket again, retry with a growing delay until it
+        succeeds or the subscriber is stopped. Then subscribe to all the
+        classes again, the old subscriptions belonged to the closed WebSocket.
+        """
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                self._ws.close()
+                self._connect()
+                break
+            except (websocket.WebSocketException, OSError,
+                    requests.RequestException) as error:
+                self._refresh_error(error)
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        else:
+            return
+
+        with self._lock:
+            self.reconnects += 1
+            self._lost.update(self.subscriptions.values())
+            self.subscriptions.clear()
+        self._resubscribe_lost()
+
+    def start(self):
+        """
+        Open the WebSocket and subscribe to all the classes.
+        The WebSocket has to be opened before the subscriptions are sent.
+        """
+        self._connect()
+
+        for mo_class in self.classes:
+            self._subscribe(mo_class)
+
+        self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        """
+        Stop refreshing the subscriptions and close the WebSocket.
+        """
+        self._stop.set()
+        if self._ws:
+            self._ws.close()
+
+    def apply(self, mo_class, attributes):
+        """
+        Apply one MO delta to the local model and return the change event:
+        {
+            "type": "created" | "modified" | "deleted",
+            "class": "fvTenant",
+            "dn": "uni/tn-Tenant1",
+            "changes": {attribute: [old value, new value]}
+        }
+        Return None if the delta didn't change anything.
+        """
+        attributes = dict(attributes)
+        dn = attributes['dn']
+        status = attributes.pop('status', '') or 'modified'
+
+        with self._lock:
+            objects = self.model.setdefault(mo_class, {})
+            current = objects.get(dn)
+
+            if status == 'deleted':
+                if current is None:
+                    return None
+                del objects[dn]
+                changes = {key: [value, None] for key, value in current.items()}
+            else:
+                if current is None:
+                    status = 'created'
+                    current = objects[dn] = {}
+                changes = {
+                    key: [current.get(key), value]
+                    for key, value in attributes.items()
+                    if current.get(key) != value
+                }
+                current.update(attributes)
+                if not changes:
+                    return None
+
+        return {'type': status, 'class': mo_class, 'dn': dn, 'changes': changes}
+
+    def events(self):
+        """
+        Generator which yields the change events until stop() is called.
+        """
+        while not self._stop.is_set():
+            # The changes found when a class was subscribed again
+            while not self._resync_events.empty():
+                yield self._resync_events.get()
+
+            try:
+                message = self._ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except (websocket.WebSocketException, OSError):
+                # The WebSocket was closed, not by stop()
+                if self._stop.is_set():
+                    break
+                self._reconnect()
+                continue
+            if not message:
+                continue
+
+            for mo in json.loads(message).get('imdata', []):
+                for mo_class, data in mo.items():
+                    event = self.apply(mo_class, data['attributes'])
+                    if event:
+                        yield event
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Subscribe to APIC MO class changes'
+    )
+    parser.add_argument('classes', nargs='*', default=['topSystem', 'fvTenant'],
+                        help='MO classes to subscribe to')
+    args = parser.parse_args()
+
+    subscriber = ApicSubscriber(args.classes)
+    subscriber.start()
+    for mo_class, objects in subscriber.model.items():
+        print(f'{mo_class}: {len(objects)} objects loaded')
+
+    # Print the change events until the script is interrupted (Ctrl+C)
+    try:
+        for event in subscriber.events():
+            print(json.dumps(event, indent=4))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.stop()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+"""
+This script will provision many tenants with their VRFs, bridge domains,
+application profiles and EPGs via the ACI Cobra SDK.
+
+The cobra_create_tenant.py script creates one Tenant MO, commits it with
+one ConfigRequest and then does another lookupByDn() round trip.
+Onboarding hundreds of tenants this way means hundreds of APIC
+transactions done one after the other.
+
+Here the tenants are read from a declarative spec (see provision_spec.py
+and tenants_spec.json) and their MOs are grouped under the shared "uni"
+parent (polUni MO) into size-bounded ConfigRequest batches:
+  - one batch contains whole tenant subtrees (tenant + VRFs + BDs + EPGs)
+  - one batch contains at most --batch-size MOs, a tenant bigger than
+    that is committed in its own batch
+  - the batches are committed in parallel by a pool of worker threads
+  - a failed commit is retried with an exponential backoff
+
+At the end the commit throughput is reported in objects/second.
+
+Usage:
+    python cobra_bulk_provision.py tenants_spec.json
+    python cobra_bulk_provision.py tenants_spec.json --batch-size 200 --workers 4
+
+Getting Started with the Cisco APIC Python API:
+https://cobra.readthedocs.io/en/latest/getting-started.html
+"""
+
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cobra.mit.access import MoDirectory
+from cobra.mit.session import LoginSession
+from cobra.mit.request import ConfigRequest
+from cobra.model.pol import Uni
+from cobra.model.fv import Tenant, Ctx, BD, RsCtx, Ap, AEPg, RsBd
+
+# APIC URL and credentials are shared with the other APIC scripts
+from apic_client import APIC_URL, USERNAME, PASSWORD
+from provision_spec import load_spec
+
+
+# Cobra model class of each MO class used in the spec
+MO_CLASSES = {
+    'fvTenant': Tenant,
+    'fvCtx':    Ctx,
+    'fvBD':     BD,
+    'fvRsCtx':  RsCtx,
+    'fvAp':     Ap,
+    'fvAEPg':   AEPg,
+    'fvRsBd':   RsBd,
+}
+
+
+def build_mos(uni_mo, records):
+    """
+    Build the Cobra MOs from the records under the given polUni MO.
+    The records have to be ordered parent before child.
+    A record with the "container" key set is only used as a parent of
+    other MOs and is not marked dirty, so it's not committed itself.
+    """
+    mos = {'uni': uni_mo}
+    for record in records:
+        mo_class = MO_CLASSES[record['class']]
+        parent = mos[record['parent']]
+        mos[record['dn']] = mo_class(
+            parent,
+            markDirty=not record.get('container', False),
+            **record['naming'],
+            **record['attrs']
+        )
+    return mos
+
+
+def build_batches(units, batch_size=100):
+    """
+    Pack the units (lists of records, e.g. one tenant subtree) into
+    ConfigRequest batches with at most batch_size MOs.
+    Return the list of (ConfigRequest, number of MOs) tuples.
+    """
+    batches = []
+    uni_mo, count = None, 0
+    for records in units:
+        if uni_mo is not None and count + len(records) > batch_size:
+            batches.append((uni_mo, count))
+            uni_mo, count = None, 0
+        if uni_mo is None:
+            uni_mo = Uni('')
+        build_mos(uni_mo, records)
+        count += sum(1 for record in records if not record.get('container'))
+    if uni_mo is not None:
+        batches.append((uni_mo, count))
+
+    config_requests = []
+    for uni_mo, count in batches:
+        config_request = ConfigRequest()
+        config_request.addMo(uni_mo)
+        config_requests.append((config_request, count))
+    return config_requests
+
+
+def commit(mo_dir, config_request, retries=3, backoff=1.0):
+    """
+    Commit one ConfigRequest, retry with an exponential backoff if it fails.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return mo_dir.commit(config_request)
+        except Exception as error:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print(f'Commit failed ({error}), retrying in {delay}s')
+            time.sleep(delay)
+
+
+def commit_batches(mo_dir, batches, workers=4, retries=3):
+    """
+    Commit all the batches in parallel and return the commit statistics.
+    """
+    start = time.perf_counter()
+    objects = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(commit, mo_dir, config_request, retries): count
+            for config_request, count in batches
+        }
+        for future in as_completed(futures):
+            future.result()
+            objects += futures[future]
+
+    seconds = time.perf_counter() - start
+    return {
+        'batches': len(batches),
+        'objects': objects,
+        'seconds': round(seconds, 3),
+        'objects_per_second': round(objects / seconds, 1) if seconds else None,
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Bulk tenant provisioning with batched ConfigRequests'
+    )
+    parser.add_argument('spec', help='JSON spec file, e.g. tenants_spec.json')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='max. number of MOs in one ConfigRequest')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='number of parallel commits')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='number of retries of a failed commit')
+    args = parser.parse_args()
+
+    # Connecting and Authenticating - create a new session and login
+    loginSession = LoginSession(APIC_URL, USERNAME, PASSWORD)
+    mo_dir = MoDirectory(loginSession)
+    mo_dir.login()
+
+    # Read the spec and group the tenants into batches
+    batches = build_batches(load_spec(args.spec), args.batch_size)
+
+    # Commit all batches and print the throughput
+    stats = commit_batches(mo_dir, batches, args.workers, args.retries)
+    print(f"Committed {stats['objects']} objects in {stats['batches']} batches "
+          f"in {stats['seconds']}s ({stats['objects_per_second']} objects/s)")
+
+    mo_dir.logout()
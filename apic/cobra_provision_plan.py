@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+"""
+This script will provision tenants in the plan/apply way: only the MOs
+which differ from the spec are committed.
+
+The cobra_create_tenant.py and cobra_bulk_provision.py scripts commit all
+the MOs unconditionally, so re-running a provisioning job re-posts every
+object and costs a full APIC transaction each time.
+
+The plan/apply mode works like this:
+  1. Read the current state of all the tenants in the spec with one
+     class query with the full subtree (rsp-subtree=full):
+     /api/node/class/fvTenant.json?query-target-filter=or(eq(fvTenant.name,"Tenant1"),...)
+                                  &rsp-subtree=full
+  2. Compare the current MOs with the spec records in memory and build
+     the plan - the list of MOs which have to be created or modified.
+  3. Commit only the MOs from the plan (see cobra_bulk_provision.py for the
+     batching). The parents of a changed MO are added to the ConfigRequest
+     only as containers and are not posted themselves.
+
+If the spec is already converged the plan is empty and no write call
+is done at all. MOs which exist on the APIC but are not in the spec are
+left untouched.
+
+Example of the plan:
+[
+    {
+        "action": "modify",
+        "class": "fvTenant",
+        "dn": "uni/tn-Tenant1",
+        "changes": {
+            "descr": ["", "Provisioned by script"]
+        }
+    },
+    {
+        "action": "create",
+        "class": "fvBD",
+        "dn": "uni/tn-Tenant1/BD-bd-db",
+        "changes": {
+            "name": [null, "bd-db"]
+        }
+    }
+]
+
+Usage:
+    python cobra_provision_plan.py plan tenants_spec.json
+    python cobra_provision_plan.py apply tenants_spec.json
+
+Getting Started with the Cisco APIC Python API:
+https://cobra.readthedocs.io/en/latest/getting-started.html
+"""
+
+import json
+import argparse
+
+from cobra.mit.access import MoDirectory
+from cobra.mit.session import LoginSession
+from cobra.mit.request import ClassQuery
+
+# APIC URL and credentials are shared with the other APIC scripts
+from apic_client import APIC_URL, USERNAME, PASSWORD
+from provision_spec import load_spec
+from cobra_bulk_provision import build_batches, commit_batches
+
+
+def read_current(mo_dir, tenant_names):
+    """
+    Read the current subtree of all the tenants with a single query and
+    return the dictionary {dn: Mo} of all the MOs found.
+    """
+    query = ClassQuery('fvTenant')
+    filters = [f'eq(fvTenant.name,"{name}")' for name in tenant_names]
+    query.propFilter = filters[0] if len(filters) == 1 else f"or({','.join(filters)})"
+    query.subtree = 'full'
+
+    current = {}
+    pending = list(mo_dir.query(query))
+    while pending:
+        mo = pending.pop()
+        current[str(mo.dn)] = mo
+        pending.extend(mo.children)
+    return current
+
+
+def plan(units, current):
+    """
+    Compare the spec records with the current MOs and return the plan.
+    """
+    changes_plan = []
+    for records in units:
+        for record in records:
+            mo = current.get(record['dn'])
+            desired = dict(record['naming'], **record['attrs'])
+            if mo is None:
+                changes_plan.append({
+                    'action': 'create',
+                    'class': record['class'],
+                    'dn': record['dn'],
+                    'changes': {key: [None, value] for key, value in desired.items()},
+                })
+                continue
+
+            changes = {}
+            for key, value in desired.items():
+                current_value = getattr(mo, key, None)
+                if str(current_value) != str(value):
+                    changes[key] = [current_value, value]
+            if changes:
+                changes_plan.append({
+                    'action': 'modify',
+                    'class': record['class'],
+                    'dn': record['dn'],
+                    'changes': changes,
+                })
+    return changes_plan
+
+
+def plan_units(units, changes_plan):
+    """
+    Build the record units which contain only the changed MOs.
+    The parents of the changed MOs are added as containers, a modified MO
+    carries only its naming properties and the changed properties.
+    """
+    changed = {change['dn']: change for change in changes_plan}
+    plan_records = []
+    for records in units:
+        by_dn = {record['dn']: record for record in records}
+        needed = set()
+        for record in records:
+            if record['dn'] in changed:
+                dn = record['dn']
+                while dn in by_dn:
+                    needed.add(dn)
+                    dn = by_dn[dn]['parent']
+        if not needed:
+            continue
+
+        unit = []
+        for record in records:
+            if record['dn'] not in needed:
+                continue
+            record = dict(record)
+            change = changed.get(record['dn'])
+            if change is None:
+                record['container'] = True
+                record['attrs'] = {}
+            elif change['action'] == 'modify':
+                record['attrs'] = {
+                    key: value for key, value in record['attrs'].items()
+                    if key in change['changes']
+                }
+            unit.append(record)
+        plan_records.append(unit)
+    return plan_records
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Diff-based idempotent tenant provisioning'
+    )
+    parser.add_argument('mode', choices=['plan', 'apply'],
+                        help='plan - print the changes, apply - commit them')
+    parser.add_argument('spec', help='JSON spec file, e.g. tenants_spec.json')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='max. number of MOs in one ConfigRequest')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='number of parallel commits')
+    args = parser.parse_args()
+
+    # Connecting and Authenticating - create a new session and login
+    loginSession = LoginSession(APIC_URL, USERNAME, PASSWORD)
+    mo_dir = MoDirectory(loginSession)
+    mo_dir.login()
+
+    # Read the spec and the current state of its tenants
+    units = load_spec(args.spec)
+    tenant_names = [records[0]['naming']['name'] for records in units]
+    current = read_current(mo_dir, tenant_names) if tenant_names else {}
+
+    changes_plan = plan(units, current)
+    print(json.dumps(changes_plan, indent=4))
+    print(f'{len(changes_plan)} MOs to change')
+
+    if args.mode == 'apply' and changes_plan:
+        batches = build_batches(plan_units(units, changes_plan), args.batch_size)
+        stats = commit_batches(mo_dir, batches, args.workers)
+        print(f"Committed {stats['objects']} objects in {stats['batches']} batches "
+              f"in {stats['seconds']}s ({stats['objects_per_second']} objects/s)")
+    elif args.mode == 'apply':
+        print('Nothing to do, the spec is already converged')
+
+    mo_dir.logout()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+Declarative tenant provisioning spec used by the cobra_bulk_provision.py
+script.
+
+The spec is a JSON file which describes the tenants with their VRFs,
+bridge domains, application profiles and EPGs:
+{
+    "tenants": [
+        {
+            "name": "Tenant1",
+            "descr": "Provisioned by script",
+            "vrfs": [{"name": "vrf1"}],
+            "bds": [{"name": "bd1", "vrf": "vrf1"}],
+            "apps": [
+                {
+                    "name": "app1",
+                    "epgs": [{"name": "web", "bd": "bd1"}]
+                }
+            ]
+        }
+    ]
+}
+
+The spec is flattened into a list of MO records, parent always before
+its children. Each record describes one MO with its class, dn, parent dn,
+naming properties and other properties:
+{
+    "class": "fvBD",
+    "dn": "uni/tn-Tenant1/BD-bd1",
+    "parent": "uni/tn-Tenant1",
+    "naming": {"name": "bd1"},
+    "attrs": {}
+}
+
+The relation between an MO and its naming properties can be found
+in the APIC Management Information Model reference:
+https://developer.cisco.com/site/apic-mim-ref-api/
+"""
+
+import sys
+import json
+
+
+def _record(mo_class, dn, parent, naming=None, attrs=None):
+    """
+    Build one MO record.
+    """
+    return {
+        'class': mo_class,
+        'dn': dn,
+        'parent': parent,
+        'naming': naming or {},
+        'attrs': attrs or {},
+    }
+
+
+def _extra(spec, *keys):
+    """
+    Return the spec items which are plain MO properties, skipping the
+    keys used for the naming and the child objects.
+    """
+    return {
+        key: value for key, value in spec.items()
+        if key not in keys and not isinstance(value, (list, dict))
+    }
+
+
+def tenant_records(tenant):
+    """
+    Flatten one tenant spec into the list of MO records.
+    """
+    tn_dn = f"uni/tn-{tenant['name']}"
+    records = [
+        _record('fvTenant', tn_dn, 'uni', {'name': tenant['name']},
+                _extra(tenant, 'name'))
+    ]
+
+    for vrf in tenant.get('vrfs', []):
+        records.append(_record(
+            'fvCtx', f"{tn_dn}/ctx-{vrf['name']}", tn_dn,
+            {'name': vrf['name']}, _extra(vrf, 'name')
+        ))
+
+    for bd in tenant.get('bds', []):
+        bd_dn = f"{tn_dn}/BD-{bd['name']}"
+        records.append(_record(
+            'fvBD', bd_dn, tn_dn, {'name': bd['name']}, _extra(bd, 'name', 'vrf')
+        ))
+        if bd.get('vrf'):
+            records.append(_record(
+                'fvRsCtx', f'{bd_dn}/rsctx', bd_dn, {}, {'tnFvCtxName': bd['vrf']}
+            ))
+
+    for app in tenant.get('apps', []):
+        app_dn = f"{tn_dn}/ap-{app['name']}"
+        records.append(_record(
+            'fvAp', app_dn, tn_dn, {'name': app['name']}, _extra(app, 'name')
+        ))
+        for epg in app.get('epgs', []):
+            epg_dn = f"{app_dn}/epg-{epg['name']}"
+            records.append(_record(
+                'fvAEPg', epg_dn, app_dn, {'name': epg['name']},
+                _extra(epg, 'name', 'bd')
+            ))
+            if epg.get('bd'):
+                records.append(_record(
+                    'fvRsBd', f'{epg_dn}/rsbd', epg_dn, {}, {'tnFvBDName': epg['bd']}
+                ))
+
+    return records
+
+
+def load_spec(file_name):
+    """
+    Read the JSON spec file and return the list of tenant record lists,
+    one list per tenant.
+    """
+    with open(file_name) as spec_file:
+        spec = json.load(spec_file)
+    return [tenant_records(tenant) for tenant in spec.get('tenants', [])]
+
+
+if __name__ == "__main__":
+
+    for records in load_spec(sys.argv[1] if len(sys.argv) > 1 else 'tenants_spec.json'):
+        print(json.dumps(records, indent=4))
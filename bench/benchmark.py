@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+
+"""
+This script will benchmark the collector scripts of all the controllers
+(APIC, DNA Center, Meraki, NSO, SD-WAN, Webex and UCS) against the local
+mock server (see ../mock/mock_server.py) with generated datasets of
+different sizes, e.g. 1k, 10k and 100k records.
+
+For every collector and dataset size the following is measured:
+  - wall_time      - run time of the whole script in seconds
+  - requests       - number of HTTP requests received by the mock server
+  - bytes          - number of bytes sent by the mock server
+  - peak_rss_kb    - peak resident memory of the script process in kB
+  - json_parse     - time spent in the response.json() calls in seconds
+
+Each collector runs in its own process, so the peak memory of one run
+doesn't affect the other runs. The output of the scripts is discarded.
+
+The results are saved into the results directory as a JSON file named
+after the current git commit and compared with the previous results file,
+so the regressions between commits show up:
+
+    meraki/get_devices.py  10000  wall_time  1.52s -> 2.31s  (+52%)  REGRESSION
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes 1000 10000 --collectors meraki/get_devices.py
+    python benchmark.py --latency 0.02 --timeout 300
+
+NOTE: some collectors issue one request per record (e.g. the Meraki
+scripts use per_page=2 and the Webex script max=1), so the biggest datasets
+can take a long time or fail. A failed or timed out run is stored with its
+error and doesn't stop the benchmark.
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import shutil
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# The mock server, recorder and runner live in the mock directory
+sys.path.insert(0, os.path.join(ROOT, 'mock'))
+from mock_server import Fixtures, MockServer   # noqa: E402
+
+# A run slower by more than this ratio is reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+# Dataset generators - each function returns the mock server fixtures
+# with the given number of records for one collector script.
+
+def _apic_login(fixtures):
+    fixtures.add('POST', '/api/aaaLogin.json', {
+        'imdata': [{'aaaLogin': {'attributes': {
+            'token': 'bench-token',
+            'refreshTimeoutSeconds': '600',
+            'maximumLifetimeSeconds': '86400',
+        }}}]
+    })
+
+
+def apic_devices(size):
+    fixtures = Fixtures()
+    _apic_login(fixtures)
+    imdata = []
+    for i in range(size):
+        attributes = {f'attr{n}': 'unspecified' for n in range(40)}
+        attributes.update({
+            'dn': f'topology/pod-1/node-{i + 101}/sys',
+            'name': f'leaf-{i + 1}',
+            'address': f'10.0.{i // 256 % 256}.{i % 256}',
+            'role': 'leaf',
+            'inbMgmtAddr': '0.0.0.0',
+            'inbMgmtAddr6': '::',
+        })
+        imdata.append({'topSystem': {'attributes': attributes}})
+    fixtures.add('GET', '/api/node/class/topology/pod-1/topSystem.json',
+                 {'totalCount': str(size), 'imdata': imdata})
+    return fixtures
+
+
+def apic_tenants(size):
+    fixtures = Fixtures()
+    _apic_login(fixtures)
+    imdata = [
+        {'fvTenant': {'attributes': {
+            'dn': f'uni/tn-tenant-{i}', 'name': f'tenant-{i}', 'lcOwn': 'local',
+            'monPolDn': 'uni/tn-common/monepg-default', 'descr': '',
+        }}}
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/api/node/class/fvTenant.json',
+                 {'totalCount': str(size), 'imdata': imdata})
+    return fixtures
+
+
+def dna_devices(size):
+    fixtures = Fixtures()
+    fixtures.add('POST', '/dna/system/api/v1/auth/token', {'Token': 'bench-token'})
+    devices = [
+        {
+            'id': f'device-{i}', 'hostname': f'router-{i}.abc.inc',
+            'managementIpAddress': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+            'family': 'Routers', 'softwareType': 'IOS-XE', 'softwareVersion': '16.3.2',
+            'reachabilityStatus': 'Reachable', 'lastUpdateTime': 1615700392454,
+            'serialNumber': f'FXS{i:08d}',
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/dna/intent/api/v1/network-device',
+                 {'response': devices, 'version': '1.0'})
+    fixtures.add('GET', '/dna/intent/api/v1/network-device/count',
+                 {'response': size, 'version': '1.0'})
+    return fixtures
+
+
+def meraki_devices(size):
+    fixtures = Fixtures()
+    devices = [
+        {
+            'name': '', 'serial': f'Q2EK-{i:04d}-{i // 10000:04d}',
+            'mac': f'e0:55:3d:{i // 65536 % 256:02x}:{i // 256 % 256:02x}:{i % 256:02x}',
+            'networkId': f'L_{i % 50}', 'model': 'MR84', 'lanIp': '192.168.128.3',
+            'firmware': 'wireless-27-6', 'configurationUpdatedAt': '2021-02-25T10:19:14Z',
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/api/v0/organizations/549236/devices', devices)
+    return fixtures
+
+
+def meraki_networks(size):
+    fixtures = Fixtures()
+    networks = [
+        {
+            'id': f'L_{i}', 'organizationId': '549236', 'name': f'network-{i}',
+            'timeZone': 'America/Los_Angeles', 'tags': None,
+            'productTypes': ['appliance', 'switch', 'wireless'], 'type': 'combined',
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/api/v0/organizations/549236/networks', networks)
+    return fixtures
+
+
+def meraki_organizations(size):
+    fixtures = Fixtures()
+    fixtures.add('GET', '/api/v0/organizations', [
+        {'id': str(i), 'name': f'organization-{i}', 'url': f'https://n1.meraki.com/o/{i}'}
+        for i in range(size)
+    ])
+    return fixtures
+
+
+def nso_devices(size):
+    fixtures = Fixtures()
+    devices = [
+        {
+            'name': f'rtr-{i}', 'address': f'10.10.{i // 256 % 256}.{i % 256}',
+            'port': 22, 'authgroup': 'labadmin',
+            'state': {'admin-state': 'unlocked'},
+            'device-type': {'cli': {'ned-id': 'cisco-ios-cli-6.42:cisco-ios-cli-6.42'}},
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/restconf/data/tailf-ncs:devices',
+                 {'tailf-ncs:devices': {'device': devices}},
+                 headers={'Content-Type': 'application/yang-data+json'})
+    return fixtures
+
+
+def nso_services(size):
+    fixtures = Fixtures()
+    services = [
+        {
+            'name': f'tpl{i}', 'device': f'rtr-{i}', 'loopback-number': i % 100,
+            'ip-address': f'1.1.{i // 256 % 256}.{i % 256}',
+            'modified': {'devices': [f'rtr-{i}']},
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/restconf/data/tailf-ncs:services',
+                 {'tailf-ncs:services': {'loopbackdevnet:loopbackdevnet': services}},
+                 headers={'Content-Type': 'application/yang-data+json'})
+    return fixtures
+
+
+def sdwan_devices(size):
+    fixtures = Fixtures()
+    fixtures.add('POST', '/j_security_check', '',
+                 headers={'Set-Cookie': 'JSESSIONID=bench-session; Path=/'})
+    fixtures.add('GET', '/dataservice/client/token', 'bench-xsrf-token',
+                 headers={'Content-Type': 'text/plain'})
+    devices = [
+        {
+            'deviceId': f'10.10.{i // 256 % 256}.{i % 256}', 'host-name': f'vedge-{i}',
+            'device-type': 'vedge', 'reachability': 'reachable', 'status': 'normal',
+            'version': '19.2.1', 'site-id': str(i % 1000), 'uuid': f'uuid-{i}',
+        }
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/dataservice/device', {'data': devices})
+    return fixtures
+
+
+def webex_rooms(size):
+    fixtures = Fixtures()
+    rooms = [
+        {'id': f'room-{i}', 'title': f'Room {i}', 'type': 'group', 'isLocked': False,
+         'lastActivity': '2021-03-01T10:00:00.000Z'}
+        for i in range(size)
+    ]
+    fixtures.add('GET', '/v1/rooms', {'items': rooms})
+    fixtures.add('GET', '/v1/rooms/room-0', rooms[0])
+    fixtures.add('GET', '/v1/rooms/room-0/meetingInfo',
+                 {'roomId': 'room-0', 'meetingLink': 'https://example.webex.com/m/1'})
+    return fixtures
+
+
+def ucs_blades(size):
+    fixtures = Fixtures()
+    headers = {'Content-Type': 'text/xml'}
+    fixtures.add('POST', '/nuova', (
+        '<aaaLogin cookie="" response="yes" outCookie="bench-cookie" '
+        'outRefreshPeriod="600" outPriv="admin" outDomains="" outChannel="noencssl" '
+        'outEvtChannel="noencssl" outSessionId="" outVersion="3.2(2b)" '
+        'outName="ucspe"></aaaLogin>'
+    ), headers=headers, match_body='aaaLogin')
+    blades = ''.join(
+        f'<computeBlade dn="sys/chassis-{i // 8 + 1}/blade-{i % 8 + 1}" '
+        f'chassisId="{i // 8 + 1}" slotId="{i % 8 + 1}" model="UCSB-B200-M4" '
+        f'serial="SRV{i:06d}" operState="ok"/>'
+        for i in range(size)
+    )
+    fixtures.add('POST', '/nuova', (
+        '<configResolveClass cookie="bench-cookie" response="yes" '
+        f'classId="computeBlade"><outConfigs>{blades}</outConfigs></configResolveClass>'
+    ), headers=headers, match_body='configResolveClass')
+    fixtures.add('POST', '/nuova',
+                 '<aaaLogout cookie="" response="yes" outStatus="success"></aaaLogout>',
+                 headers=headers, match_body='aaaLogout')
+    return fixtures
+
+
+# Collector script (relative to the repository root) and its dataset
+COLLECTORS = {
+    'apic/apic_get_devices.py':       apic_devices,
+    'apic/apic_get_tenants.py':       apic_tenants,
+    'dna/get_devices.py':             dna_devices,
+    'dna/dna_async_devices.py':       dna_devices,
+    'meraki/get_devices.py':          meraki_devices,
+    'meraki/get_networks.py':         meraki_networks,
+    'meraki/get_organizations.py':    meraki_organizations,
+    'nso/get_devices.py':             nso_devices,
+    'nso/get_services.py':            nso_services,
+    'sdwan/get_devices.py':           sdwan_devices,
+    'webex/get_rooms.py':             webex_rooms,
+    'ucs/get_blades.py':              ucs_blades,
+}
+
+
+def peak_rss_kb():
+    """
+    Return the peak resident memory of this process in kB.
+    On Linux the ru_maxrss value survives the exec() of a new process and
+    would show the memory of the parent, so VmHWM is used when available.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_child(mock_url, script, stats_file):
+    """
+    Run the collector script in this process against the mock server and
+    write the wall time, JSON parse time and peak RSS into the stats file.
+    """
+    import requests
+    from mock_run import redirect
+    from mock_recorder import run_script
+
+    # Measure the time spent in the response.json() calls
+    parse_time = [0.0]
+    original_json = requests.models.Response.json
+
+    def timed_json(response, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_json(response, **kwargs)
+        finally:
+            parse_time[0] += time.perf_counter() - start
+
+    requests.models.Response.json = timed_json
+
+    # Discard the output of the script
+    sys.stdout = open(os.devnull, 'w')
+
+    error = None
+    start = time.perf_counter()
+    try:
+        with redirect(mock_url):
+            run_script(os.path.join(ROOT, script), [])
+    except BaseException as exception:
+        error = f'{type(exception).__name__}: {exception}'[:300]
+    wall_time = time.perf_counter() - start
+
+    with open(stats_file, 'w') as stats:
+        json.dump({
+            'wall_time': round(wall_time, 4),
+            'json_parse': round(parse_time[0], 4),
+            'peak_rss_kb': peak_rss_kb(),
+            'error': error,
+        }, stats)
+
+
+def run_one(script, size, latency, timeout):
+    """
+    Start the mock server with the generated dataset, run the collector
+    in a child process and return its measurements.
+    """
+    server = MockServer(COLLECTORS[script](size), latency=latency).start()
+    stats_file = os.path.join(RESULTS_DIR, f'.child-{os.getpid()}.json')
+    result = {'script': script, 'size': size}
+
+    # The collectors may cache their tokens in the home directory,
+    # the child gets a clean temporary one.
+    home = tempfile.mkdtemp(prefix='bench-home-')
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child',
+             server.url, script, stats_file],
+            timeout=timeout, check=False, env=dict(os.environ, HOME=home),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        with open(stats_file) as stats:
+            result.update(json.load(stats))
+    except subprocess.TimeoutExpired:
+        result['error'] = f'timeout after {timeout}s'
+    except (OSError, ValueError) as error:
+        result['error'] = f'no stats from the child process: {error}'
+    finally:
+        result['requests'] = server.stats['requests']
+        result['bytes'] = server.stats['bytes_sent']
+        server.stop()
+        shutil.rmtree(home, ignore_errors=True)
+        if os.path.exists(stats_file):
+            os.remove(stats_file)
+    return result
+
+
+def git_commit():
+    """
+    Return the short hash of the current git commit or "unknown".
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(previous, current):
+    """
+    Print the runs which got slower than the previous results.
+    """
+    old_runs = {(run['script'], run['size']): run for run in previous['runs']}
+    for run in current['runs']:
+        old = old_runs.get((run['script'], run['size']))
+        if not old or old.get('error') or run.get('error'):
+            continue
+        for metric in ('wall_time', 'requests', 'bytes', 'peak_rss_kb', 'json_parse'):
+            before, after = old.get(metric), run.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change > REGRESSION_THRESHOLD:
+                print(f"{run['script']:30} {run['size']:>7}  {metric:12} "
+                      f"{before} -> {after}  (+{change:.0%})  REGRESSION")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        run_child(*sys.argv[2:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Benchmark the collector scripts')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='dataset sizes (number of records)')
+    parser.add_argument('--collectors', nargs='+', default=list(COLLECTORS),
+                        choices=list(COLLECTORS), help='collector scripts to run')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='mock server latency of every response in seconds')
+    parser.add_argument('--timeout', type=int, default=600,
+                        help='max. run time of one collector in seconds')
+    args = parser.parse_args()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    current = {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'latency': args.latency, 'runs': []}
+
+    print(f"{'collector':30} {'size':>7} {'wall_time':>10} {'requests':>9} "
+          f"{'bytes':>11} {'peak_rss_kb':>11} {'json_parse':>10}")
+    for script in args.collectors:
+        for size in args.sizes:
+            run = run_one(script, size, args.latency, args.timeout)
+            current['runs'].append(run)
+            if run.get('error'):
+                print(f"{script:30} {size:>7} ERROR {run['error']}")
+                continue
+            print(f"{script:30} {size:>7} {run['wall_time']:>10} {run['requests']:>9} "
+                  f"{run['bytes']:>11} {run['peak_rss_kb']:>11} {run['json_parse']:>10}")
+
+    # Compare with the latest results of a different commit
+    previous_files = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')),
+                            key=os.path.getmtime)
+    previous_files = [name for name in previous_files
+                      if not name.endswith(f'-{commit}.json')]
+    if previous_files:
+        with open(previous_files[-1]) as previous_file:
+            compare(json.load(previous_file), current)
+
+    results_file = os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    )
+    with open(results_file, 'w') as output:
+        json.dump(current, output, indent=4)
+    print(f'Results saved to {results_file}')
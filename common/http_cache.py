@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+"""
+On-disk HTTP cache for the GET requests made with the requests library.
+
+The lists of organizations, networks or Webex rooms barely change between
+the runs of a script, but they are downloaded in full every time.
+
+The CachingAdapter below is a transport adapter which can be mounted to
+any requests.Session(), so the scripts don't have to change the way they
+make the requests:
+  - the body of every HTTP 200 GET response is stored in the cache
+    directory under the hash of the URL (with the query parameters) and
+    the credentials headers, so two API keys never share one entry
+  - if the response had the ETag or Last-Modified header, the next request
+    is sent with the If-None-Match / If-Modified-Since header and the
+    cached body is used when the API answers with HTTP 304 (Not Modified)
+  - if the API doesn't send any of these headers, the cached body is used
+    without any request while it's younger than the TTL
+  - when the cache is bigger than the size cap, the least recently used
+    entries are removed - the size is kept as a running total, so the cache
+    directory is listed only once and then whenever it's over the cap
+
+Every cached response has the "X-Cache" header set to HIT (no request was
+sent), REVALIDATED (HTTP 304) or MISS.
+
+Example:
+    import requests
+    from http_cache import CachingAdapter, HttpCache
+    session = requests.Session()
+    session.mount('https://', CachingAdapter(HttpCache(ttl=300)))
+    session.get('https://api.meraki.com/api/v0/organizations')
+    print(session.get_adapter('https://').cache.stats)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# Default cache directory, TTL (seconds) and size cap (bytes)
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'devasc_http_cache')
+CACHE_TTL = 300
+CACHE_SIZE = 50 * 1024 * 1024
+
+# The eviction goes down to this part of the size cap, so the next entries
+# don't trigger another eviction at once
+EVICT_TO = 0.9
+
+# Headers with credentials, their values are a part of the cache key
+CREDENTIAL_HEADERS = ('Authorization', 'X-Cisco-Meraki-API-Key', 'X-Auth-Token', 'Cookie')
+
+# Headers which are not stored, the body is stored already decoded
+SKIPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length',
+                   'connection', 'set-cookie'}
+
+
+class HttpCache:
+    """
+    HTTP response bodies stored in a directory with LRU eviction.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_size=CACHE_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        # Running total of the entry sizes, None until the first listing
+        self._size = None
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0,
+                      'bytes_saved': 0}
+
+    def key(self, request):
+        """
+        Return the cache key of the request - the hash of the URL and
+        the credentials headers.
+        """
+        digest = hashlib.sha256(request.url.encode())
+        for name in CREDENTIAL_HEADERS:
+            digest.update(f"\n{name}: {request.headers.get(name, '')}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        Return the cache entry or None. The entry is marked as recently used.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as entry_file:
+                entry = json.load(entry_file)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        """
+        Store the entry and evict the least recently used entries if the
+        cache is bigger than the size cap.
+        """
+        path = self._path(key)
+        temp_name = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as entry_file:
+            json.dump(entry, entry_file)
+            new_size = entry_file.tell()
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        os.replace(temp_name, path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += new_size - old_size
+            over_cap = self._size is None or self._size > self.max_size
+        if over_cap:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries if the cache is over
+        the size cap.
+        """
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+            size = sum(entry[1] for entry in entries)
+            target = self.max_size * EVICT_TO if size > self.max_size else size
+            for _, entry_size, name in sorted(entries):
+                if size <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                size -= entry_size
+                self.stats['evicted'] += 1
+            # Other processes may write into the directory as well,
+            # the listing brings the running total up to date
+            self._size = size
+
+    def count(self, stat, saved=0):
+        with self._lock:
+            self.stats[stat] += 1
+            self.stats['bytes_saved'] += saved
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter which serves the GET requests from the HttpCache.
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache or HttpCache()
+
+    def _cached_response(self, request, entry, state):
+        response = Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['X-Cache'] = state
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK'
+        response.connection = self
+        return response
+
+    def send(self, request, **kwargs):
+        # The streamed responses are not read into memory, so not cached
+        if request.method != 'GET' or kwargs.get('stream'):
+            return super().send(request, **kwargs)
+
+        key = self.cache.key(request)
+        entry = self.cache.get(key)
+        if entry:
+            validators = entry.get('etag') or entry.get('last_modified')
+            # Without any validator, the entry is used while it's fresh
+            if not validators and time.time() - entry['stored'] < self.cache.ttl:
+                self.cache.count('hits', len(entry['body']))
+                return self._cached_response(request, entry, 'HIT')
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if entry and response.status_code == 304:
+            response.close()
+            entry['stored'] = time.time()
+            self.cache.set(key, entry)
+            self.cache.count('revalidated', len(entry['body']))
+            return self._cached_response(request, entry, 'REVALIDATED')
+
+        self.cache.count('misses')
+        cache_control = response.headers.get('Cache-Control', '')
+        if response.status_code == 200 and 'no-store' not in cache_control:
+            self.cache.set(key, {
+                'url': request.url,
+                'status': response.status_code,
+                'headers': {
+                    name: value for name, value in response.headers.items()
+                    if name.lower() not in SKIPPED_HEADERS
+                },
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'stored': time.time(),
+                'body': response.text,
+            })
+        response.headers['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+This script will retrieve all devices from the Cisco DNA Center, even
+from a large deployment with tens of thousands of devices.
+
+The get_devices.py script issues one GET to the
+/dna/intent/api/v1/network-device resource, which returns at most 500
+devices, so the result is truncated on a larger deployment.
+
+The device list has to be read in windows with the offset and limit
+query parameters (offset starts with 1, limit is at most 500):
+    /dna/intent/api/v1/network-device?offset=1&limit=500
+    /dna/intent/api/v1/network-device?offset=501&limit=500
+    ...
+
+The number of devices is available via:
+    /dna/intent/api/v1/network-device/count
+{
+    "response": 20000,
+    "version": "1.0"
+}
+
+The collector below is based on asyncio:
+  1. read the device count
+  2. schedule the requests for all offset/limit windows at once, the number
+     of requests running at the same time is bounded by a semaphore
+  3. yield the devices window by window in the original order as soon as
+     the next window arrives, not only after the last one
+
+The HTTP requests are done by the shared DnaClient (see dna_client.py) in a
+thread pool, so the keep-alive connection pool and the token are shared by
+all the requests and no extra asyncio HTTP library is needed.
+
+Usage:
+    python dna_async_devices.py
+    python dna_async_devices.py --limit 500 --concurrency 8
+
+DNA Center Platform API documentation:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import time
+import asyncio
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from dna_client import DnaClient
+from dna_token_cache import FileTokenCache
+
+
+# URL paths used to get the devices and their count
+DEV_PATH = '/intent/api/v1/network-device'
+DEV_COUNT_PATH = '/intent/api/v1/network-device/count'
+
+# DNA Center returns at most 500 devices in one response
+MAX_LIMIT = 500
+
+
+async def iter_devices(client, limit=MAX_LIMIT, concurrency=8):
+    """
+    Asynchronous generator which yields all the devices in order.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(path, **kwargs):
+        return await loop.run_in_executor(
+            executor, functools.partial(client.get, path, **kwargs)
+        )
+
+    async def fetch_window(offset):
+        async with semaphore:
+            response_json = await call(
+                DEV_PATH, params={'offset': offset, 'limit': limit}
+            )
+            return response_json['response']
+
+    count = (await call(DEV_COUNT_PATH))['response']
+
+    # All windows are scheduled at once, the semaphore bounds the number
+    # of requests running at the same time.
+    tasks = [
+        asyncio.ensure_future(fetch_window(offset))
+        for offset in range(1, count + 1, limit)
+    ]
+    try:
+        for task in tasks:
+            for device in await task:
+                yield device
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
+
+
+def walk_devices(client, limit=MAX_LIMIT):
+    """
+    Generator which yields all the devices in order, reading the
+    offset/limit windows one after the other (no asyncio needed).
+    """
+    offset = 1
+    while True:
+        window = client.get(
+            DEV_PATH, params={'offset': offset, 'limit': limit}
+        )['response']
+        yield from window
+        if len(window) < limit:
+            break
+        offset += limit
+
+
+async def main(limit, concurrency):
+    """
+    Print the hostnames of all devices as they arrive.
+    """
+    client = DnaClient(pool_size=concurrency, token_cache=FileTokenCache())
+
+    start = time.perf_counter()
+    count = 0
+    async for device in iter_devices(client, limit, concurrency):
+        print(device['hostname'])
+        count += 1
+
+    print(f'{count} devices collected in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Collect all DNA Center devices with concurrent windows'
+    )
+    parser.add_argument('--limit', type=int, default=MAX_LIMIT,
+                        help='number of devices in one window, max. 500')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='max. number of requests running at the same time')
+    args = parser.parse_args()
+
+    asyncio.run(main(min(args.limit, MAX_LIMIT), args.concurrency))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+Cisco DNA Center client with a pooled HTTP session.
+
+The get_devices.py script gets the token via the HTTP POST call and then
+makes the HTTP GET request with the requests.get() function, which opens
+a new TCP/TLS connection for every call.
+
+The DnaClient class below gets the token once and keeps one
+requests.Session() object with a keep-alive connection pool, which can be
+shared by concurrent workers.
+
+API call to get the auth token:
+/dna/system/api/v1/auth/token
+
+Once the token is generated, it's stored inside the "X-Auth-Token"
+header field of the session, so it's sent with every following request.
+
+The token can be kept in a token cache (see dna_token_cache.py) and re-used
+until shortly before it expires, even between the runs of a script. The
+client keeps the token in memory as well and reads the cache only when it
+has no token yet or the token is about to expire, so the concurrent
+requests don't wait for the cache file. If the DNA Center answers with
+HTTP 401, the client logs in again and repeats the request once.
+
+The requests can be throttled by a request scheduler (see dna_scheduler.py)
+which honors the DNA Center rate limits and HTTP 429 responses.
+
+Example:
+    from dna_client import DnaClient
+    from dna_token_cache import FileTokenCache
+    client = DnaClient(token_cache=FileTokenCache())
+    devices = client.get('/intent/api/v1/network-device')
+
+DNA Center Platform API documentation:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from dna_token_cache import MemoryTokenCache
+from dna_scheduler import INTERACTIVE
+
+# As we are working on a non-secured environment we can disable
+# security warnings related to self-signed SSL certificate.
+# Don't disable this in your production environment but rather
+# configure your systems properly and secure.
+from urllib3 import disable_warnings
+from urllib3.exceptions import InsecureRequestWarning
+disable_warnings(InsecureRequestWarning)
+
+
+# Cisco DNA Center Sandbox
+BASE_URL = "https://sandboxdnac.cisco.com/dna"
+
+# Path used to get the auth token
+AUTH_PATH = '/system/api/v1/auth/token'
+
+# Storing passwords inside your scripts is not recommended but for the demo
+# purposes it is the easiest way.
+# One recommended way is to export your credentials as an environment
+# variables and then use these variables in your script.
+#
+# Example:
+# import os
+# PASSWORD = os.getenv('MY_SECURE_PASSWORD')
+#
+# Here the environment variable is called 'MY_SECURE_PASSWORD' which
+# contains your secret password.
+USERNAME = "devnetuser"
+PASSWORD = "Cisco123!"
+
+
+def check_response(response):
+    """
+    HTTP 200 code is expected if everything is OK, otherwise raise an error.
+    """
+    if response.status_code != 200:
+        print(response.text)
+        raise requests.HTTPError(
+            f'Got HTTP {response.status_code} code instead of 200! '
+            'Please check the response above for more information.',
+            response=response
+        )
+
+
+class DnaClient:
+    """
+    DNA Center REST API client with a pooled keep-alive session.
+    """
+
+    def __init__(self, base_url=BASE_URL, username=USERNAME, password=PASSWORD,
+                 pool_size=10, verify=False, token_cache=None, scheduler=None):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.verify = verify
+        self.token_cache = token_cache or MemoryTokenCache()
+        self.scheduler = scheduler
+        self.logins = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Content-Type'] = 'application/json'
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._token_valid_until = 0.0
+
+    def login(self):
+        """
+        Get the token via the HTTP POST method with the basic auth and
+        store it inside the session headers.
+        """
+        # NOTE: verify=False is Not recommended TO USE in a production environment
+        response = self.session.post(
+            url=self.base_url + AUTH_PATH,
+            auth=(self.username, self.password),
+            verify=self.verify
+        )
+        check_response(response)
+
+        # Token is stored in the response body inside the 'Token' key.
+        self._use_token(
+            response.json()['Token'],
+            time.time() + self.token_cache.lifetime - self.token_cache.margin
+        )
+        self.token_cache.set(self._cache_key, self._token)
+        self.logins += 1
+        return self._token
+
+    @property
+    def _cache_key(self):
+        return f'{self.base_url} {self.username}'
+
+    def _use_token(self, token, valid_until):
+        self._token = token
+        self._token_valid_until = valid_until
+        self.session.headers['X-Auth-Token'] = token
+
+    @property
+    def token(self):
+        """
+        Valid DNA Center token - the one in memory or in the token cache if
+        it didn't expire yet, otherwise a new one.
+        """
+        with self._lock:
+            if self._token is None or time.time() >= self._token_valid_until:
+                cached = self.token_cache.get_entry(self._cache_key)
+                if cached is None:
+                    self.login()
+                else:
+                    self._use_token(*cached)
+            return self._token
+
+    def _send(self, method, url, **kwargs):
+        """
+        Make an authenticated HTTP request and return the response object.
+        If the token is rejected with HTTP 401, login again and repeat
+        the request once.
+        """
+        token = self.token
+        response = self.session.request(method, url, **kwargs)
+
+        if response.status_code == 401:
+            with self._lock:
+                # Another thread may have already logged in again
+                if self._token == token:
+                    self._token = None
+                    self.token_cache.delete(self._cache_key)
+                    self.login()
+            response = self.session.request(method, url, **kwargs)
+        return response
+
+    def request(self, method, path, priority=INTERACTIVE, **kwargs):
+        """
+        Make an authenticated HTTP request through the scheduler (if any)
+        and return the response object. The priority is used by the
+        scheduler, e.g. INTERACTIVE or BULK.
+        """
+        url = path if path.startswith('http') else self.base_url + path
+        kwargs.setdefault('verify', self.verify)
+        if self.scheduler is None:
+            return self._send(method, url, **kwargs)
+
+        endpoint_path = url[len(self.base_url):] if url.startswith(self.base_url) else path
+        return self.scheduler.execute(
+            endpoint_path,
+            lambda: self._send(method, url, **kwargs),
+            priority
+        )
+
+    def get(self, path, **kwargs):
+        """
+        HTTP GET the DNA Center resource and return the JSON data.
+        """
+        response = self.request('GET', path, **kwargs)
+        check_response(response)
+        return response.json()
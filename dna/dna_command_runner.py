@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+This script will run read-only CLI commands (e.g. "show version") on many
+devices via the Cisco DNA Center Command Runner API.
+
+The Command Runner API is asynchronous:
+  STEP1: submit the commands for a list of devices
+    POST /dna/intent/api/v1/network-device-poller/cli/read-request
+    {
+        "commands": ["show version", "show ip int brief"],
+        "deviceUuids": ["6aad2ec7-d1d0-4605-bf32-f62266c5f53e", ...],
+        "timeout": 0
+    }
+    The response contains the task ID:
+    {"response": {"taskId": "...", "url": "/api/v1/task/..."}, "version": "1.0"}
+
+  STEP2: poll the task until it's done
+    GET /dna/intent/api/v1/task/{taskId}
+    When the commands are done, the "progress" field contains the file ID:
+    "progress": "{\"fileId\":\"cfe9fb44-...\"}"
+
+  STEP3: download the file with the results
+    GET /dna/intent/api/v1/file/{fileId}
+    [
+        {
+            "deviceUuid": "6aad2ec7-d1d0-4605-bf32-f62266c5f53e",
+            "commandResponses": {
+                "SUCCESS": {"show version": "Cisco IOS XE Software, ..."},
+                "FAILURE": {},
+                "BLACKLISTED": {}
+            }
+        }
+    ]
+
+One request accepts only a limited number of devices, so the batch executor
+below splits the device IDs into chunks of MAX_DEVICES, submits the chunks
+concurrently and polls each task with an adaptive backoff (the delay grows
+from 0.5 s up to 10 s while the task is still running). The device results
+are printed as soon as the file of their batch is downloaded and the
+latency of every batch is recorded.
+
+Usage:
+    python dna_command_runner.py "show version"
+    python dna_command_runner.py "show version" "show ip int brief" --workers 4
+
+DNA Center Platform API documentation:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from dna_client import DnaClient
+from dna_token_cache import FileTokenCache
+from dna_scheduler import RequestScheduler, BULK
+from dna_async_devices import walk_devices
+
+# Command Runner API resources
+READ_REQUEST_PATH = '/intent/api/v1/network-device-poller/cli/read-request'
+TASK_PATH = '/intent/api/v1/task/{task_id}'
+FILE_PATH = '/intent/api/v1/file/{file_id}'
+
+# Max. number of devices and commands in one read request
+MAX_DEVICES = 100
+MAX_COMMANDS = 5
+
+
+def chunks(items, size):
+    """
+    Split the list into chunks of the given size.
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def submit(client, commands, device_ids, timeout=0):
+    """
+    Submit the read request and return the task ID.
+    """
+    response = client.request(
+        'POST', READ_REQUEST_PATH, priority=BULK,
+        json={'commands': commands, 'deviceUuids': device_ids, 'timeout': timeout}
+    )
+    # The read request is accepted with HTTP 202
+    if response.status_code not in (200, 202):
+        print(response.text)
+        raise requests.HTTPError(
+            f'Got HTTP {response.status_code} code instead of 202!', response=response
+        )
+    return response.json()['response']['taskId']
+
+
+def wait_for_file(client, task_id, first_delay=0.5, max_delay=10.0, factor=1.5,
+                  timeout=600):
+    """
+    Poll the task with an adaptive backoff and return the file ID.
+    """
+    delay = first_delay
+    deadline = time.monotonic() + timeout
+    while True:
+        task = client.get(TASK_PATH.format(task_id=task_id), priority=BULK)['response']
+        if task.get('isError'):
+            raise RuntimeError(f"Task {task_id} failed: {task.get('failureReason')}")
+
+        progress = task.get('progress', '')
+        if 'fileId' in progress:
+            return json.loads(progress)['fileId']
+
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f'Task {task_id} not done in {timeout}s')
+        time.sleep(delay)
+        delay = min(delay * factor, max_delay)
+
+
+def run_batch(client, commands, device_ids):
+    """
+    Run the commands on one chunk of devices and return the results with
+    the batch latency.
+    """
+    start = time.perf_counter()
+    task_id = submit(client, commands, device_ids)
+    file_id = wait_for_file(client, task_id)
+    results = client.get(FILE_PATH.format(file_id=file_id), priority=BULK)
+    return {
+        'task_id': task_id,
+        'devices': len(device_ids),
+        'latency': round(time.perf_counter() - start, 3),
+        'results': results,
+    }
+
+
+def run_commands(client, commands, device_ids, workers=4, chunk_size=MAX_DEVICES):
+    """
+    Generator which runs the commands on all the devices in concurrent
+    batches and yields the (device IDs, batch, error) of each batch as
+    soon as its results are downloaded. A failed batch doesn't stop the
+    others.
+    """
+    if len(commands) > MAX_COMMANDS:
+        raise ValueError(f'At most {MAX_COMMANDS} commands can be run at once')
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_batch, client, commands, chunk): chunk
+            for chunk in chunks(device_ids, chunk_size)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except (requests.RequestException, RuntimeError, TimeoutError,
+                    ValueError) as error:
+                yield futures[future], None, error
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Run CLI commands on all devices via the Command Runner API'
+    )
+    parser.add_argument('commands', nargs='+', help='read-only CLI commands')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='number of batches running at the same time')
+    args = parser.parse_args()
+
+    client = DnaClient(
+        pool_size=args.workers,
+        token_cache=FileTokenCache(),
+        scheduler=RequestScheduler()
+    )
+    # All the devices, read in offset/limit windows (one GET returns at most 500)
+    device_ids = [device['id'] for device in walk_devices(client)]
+
+    latencies = []
+    failed = 0
+    for chunk, batch, error in run_commands(client, args.commands, device_ids,
+                                            args.workers):
+        if error:
+            failed += len(chunk)
+            print(f'Batch of {len(chunk)} devices FAILED: {error}', file=sys.stderr)
+            continue
+        latencies.append(batch['latency'])
+        for result in batch['results']:
+            sys.stdout.write(json.dumps(result) + '\n')
+        print(f"Batch {batch['task_id']}: {batch['devices']} devices "
+              f"in {batch['latency']}s", file=sys.stderr)
+
+    if latencies:
+        print(f'{len(latencies)} batches, latency min {min(latencies)}s, '
+              f'max {max(latencies)}s, avg {sum(latencies) / len(latencies):.3f}s',
+              file=sys.stderr)
+    if failed:
+        print(f'{failed} devices failed', file=sys.stderr)
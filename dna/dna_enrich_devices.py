@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+This script will enrich the Cisco DNA Center device list with the
+interface, module and health details of each device.
+
+The get_devices.py script prints only the hostname of each device.
+The details are available via these per-device API calls:
+    /dna/intent/api/v1/interface/network-device/{deviceId}
+    /dna/intent/api/v1/network-device/module?deviceId={deviceId}
+    /dna/intent/api/v1/device-detail?searchBy={deviceId}&identifier=uuid
+
+Doing that one device after the other costs 3 x N sequential calls.
+The enrichment stage below fans the lookups out through a bounded pool of
+worker threads sharing one DnaClient (see dna_client.py):
+  - at most "workers" devices are looked up at the same time and only a
+    limited number of devices is queued, so the device list can be
+    a generator as well
+  - every lookup result is cached per device, so a device seen twice
+    (or enriched again in a long-running process) is not fetched again
+  - the joined record of a device is yielded as soon as all its lookups
+    complete, the order of the devices is not kept
+
+Example of the joined record:
+{
+    "device": {"id": "6aad2ec7-...", "hostname": "asr1001-x.abc.inc", ...},
+    "interfaces": [{"portName": "GigabitEthernet0/0/0", ...}, ...],
+    "modules": [{"name": "Power Supply Module 0", ...}, ...],
+    "health": {"overallHealth": 10, "cpu": "3", "memory": "46", ...}
+}
+
+The records are printed as NDJSON, one device per line.
+
+Usage:
+    python dna_enrich_devices.py
+    python dna_enrich_devices.py --workers 16
+
+DNA Center Platform API documentation:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dna_client import DnaClient
+from dna_token_cache import FileTokenCache
+from dna_scheduler import RequestScheduler, BULK
+from dna_async_devices import walk_devices
+
+
+class LookupCache:
+    """
+    Thread safe cache of the per-device lookup results.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fetch):
+        """
+        Return the cached value of the key, call fetch() to get it if it's
+        not cached yet or it's older than the ttl.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = fetch()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+
+def _lookup(client, path, params=None):
+    """
+    HTTP GET one detail resource and return its "response" value.
+    """
+    return client.get(path, params=params, priority=BULK)['response']
+
+
+def enrich_device(client, device, cache):
+    """
+    Look up the interfaces, modules and health of one device and return
+    the joined record.
+    """
+    device_id = device['id']
+    lookups = {
+        'interfaces': (f'/intent/api/v1/interface/network-device/{device_id}', None),
+        'modules': ('/intent/api/v1/network-device/module', {'deviceId': device_id}),
+        'health': ('/intent/api/v1/device-detail',
+                   {'searchBy': device_id, 'identifier': 'uuid'}),
+    }
+    record = {'device': device}
+    for name, (path, params) in lookups.items():
+        record[name] = cache.get(
+            (name, device_id), lambda: _lookup(client, path, params)
+        )
+    return record
+
+
+def enrich(client, devices, workers=8, cache=None):
+    """
+    Generator which yields the joined record of each device as soon as
+    all its lookups complete.
+    """
+    cache = cache or LookupCache()
+    devices = iter(devices)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # Keep the number of queued devices bounded
+            while not exhausted and len(pending) < workers * 2:
+                device = next(devices, None)
+                if device is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(enrich_device, client, device, cache))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Enrich the DNA Center devices with interface, module '
+                    'and health details'
+    )
+    parser.add_argument('--workers', type=int, default=8,
+                        help='number of devices looked up at the same time')
+    args = parser.parse_args()
+
+    client = DnaClient(
+        pool_size=args.workers,
+        token_cache=FileTokenCache(),
+        scheduler=RequestScheduler()
+    )
+    # All the devices, read in offset/limit windows while they're enriched
+    devices = walk_devices(client)
+
+    start = time.perf_counter()
+    count = 0
+    for record in enrich(client, devices, args.workers):
+        sys.stdout.write(json.dumps(record) + '\n')
+        count += 1
+
+    print(f'{count} devices enriched in {time.perf_counter() - start:.2f}s',
+          file=sys.stderr)
+    print(json.dumps(client.scheduler.metrics(), indent=4), file=sys.stderr)
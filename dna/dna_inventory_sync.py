@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+"""
+This script will keep a local SQLite snapshot of the Cisco DNA Center
+device inventory in sync and print only what changed since the last run.
+
+The get_devices.py script always downloads and prints the full device list,
+even though every device record carries the time of its last update:
+    "lastUpdated": "2021-03-14 05:39:52",
+    "lastUpdateTime": 1615700392454        <- epoch in milliseconds
+
+The incremental sync keeps the snapshot of all devices and the high-water
+mark (the highest lastUpdateTime seen so far) in the SQLite database.
+On the next run:
+  1. the device list is requested sorted by lastUpdateTime, newest first,
+     in small windows which grow up to the 500 devices limit:
+        /dna/intent/api/v1/network-device?sortBy=lastUpdateTime&order=desc
+                                          &offset=1&limit=25
+     and the reading stops at the first device older than the high-water
+     mark, so usually only the first small windows are downloaded - the
+     rest of that window and the next window are read as well, to verify
+     the DNA Center really sorted the devices
+  2. the device count (/network-device/count) shows whether any device was
+     removed - if the count doesn't match, or the DNA Center didn't return
+     the devices sorted, the whole list is walked once to find the removed
+     devices
+  3. every device is compared with the snapshot by a content hash, which
+     ignores the volatile fields (lastUpdateTime, upTime, ...), and the
+     added/changed/removed events are emitted
+
+Example of the events (one JSON object per line):
+{"event": "added", "id": "6aad2ec7-...", "hostname": "asr1001-x.abc.inc", "changes": []}
+{"event": "changed", "id": "6aad2ec7-...", "hostname": "asr1001-x.abc.inc", "changes": ["softwareVersion"]}
+{"event": "removed", "id": "6aad2ec7-...", "hostname": "asr1001-x.abc.inc", "changes": []}
+
+Usage:
+    python dna_inventory_sync.py
+    python dna_inventory_sync.py --db inventory.sqlite
+
+DNA Center Platform API documentation:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+
+from dna_client import DnaClient
+from dna_token_cache import FileTokenCache
+from dna_async_devices import DEV_PATH, DEV_COUNT_PATH, MAX_LIMIT
+
+# Fields which change on every inventory collection, ignored by the hash
+VOLATILE_FIELDS = {
+    'lastUpdateTime', 'lastUpdated', 'upTime', 'uptimeSeconds',
+    'bootDateTime', 'collectionStatus', 'inventoryStatusDetail',
+}
+
+
+def content_hash(device):
+    """
+    Return the hash of the device record without the volatile fields.
+    """
+    stable = {key: value for key, value in device.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode()).hexdigest()
+
+
+class InventorySnapshot:
+    """
+    SQLite snapshot of the device inventory with the high-water mark.
+    """
+
+    def __init__(self, file_name='dna_inventory.sqlite'):
+        self.db = sqlite3.connect(file_name)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS devices (
+                id TEXT PRIMARY KEY,
+                last_update_time INTEGER,
+                hash TEXT,
+                record TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+    @property
+    def watermark(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return int(row[0]) if row else None
+
+    @watermark.setter
+    def watermark(self, value):
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (value,)
+        )
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM devices').fetchone()[0]
+
+    def get(self, device_id):
+        """
+        Return the (hash, record) of the stored device or None.
+        """
+        row = self.db.execute(
+            'SELECT hash, record FROM devices WHERE id = ?', (device_id,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, device, device_hash):
+        self.db.execute(
+            'INSERT OR REPLACE INTO devices (id, last_update_time, hash, record) '
+            'VALUES (?, ?, ?, ?)',
+            (device['id'], device.get('lastUpdateTime') or 0, device_hash,
+             json.dumps(device))
+        )
+
+    def ids(self):
+        return {row[0] for row in self.db.execute('SELECT id FROM devices')}
+
+    def delete(self, device_id):
+        """
+        Remove the device and return its stored record.
+        """
+        stored = self.get(device_id)
+        self.db.execute('DELETE FROM devices WHERE id = ?', (device_id,))
+        return stored[1] if stored else {'id': device_id}
+
+    def commit(self):
+        self.db.commit()
+
+
+def _event(name, device, changes=()):
+    return {
+        'event': name,
+        'id': device['id'],
+        'hostname': device.get('hostname'),
+        'changes': list(changes),
+    }
+
+
+def _apply(snapshot, device):
+    """
+    Store the device and return its event or None if nothing changed.
+    """
+    device_hash = content_hash(device)
+    stored = snapshot.get(device['id'])
+    snapshot.put(device, device_hash)
+    if stored is None:
+        return _event('added', device)
+    if stored[0] != device_hash:
+        old = stored[1]
+        changes = sorted(
+            key for key in set(old) | set(device)
+            if key not in VOLATILE_FIELDS and old.get(key) != device.get(key)
+        )
+        return _event('changed', device, changes)
+    return None
+
+
+def _iter_windows(client, limit):
+    """
+    Generator which yields the device list windows one after the other.
+    """
+    offset = 1
+    while True:
+        window = client.get(
+            DEV_PATH, params={'offset': offset, 'limit': limit}
+        )['response']
+        yield window
+        if len(window) < limit:
+            break
+        offset += limit
+
+
+def _sorted_window(client, offset, size):
+    return client.get(DEV_PATH, params={
+        'sortBy': 'lastUpdateTime', 'order': 'desc',
+        'offset': offset, 'limit': size
+    })['response']
+
+
+def _is_descending(devices, previous):
+    for device in devices:
+        update_time = device.get('lastUpdateTime') or 0
+        if update_time > previous:
+            return False
+        previous = update_time
+    return True
+
+
+def _newer_devices(client, watermark, limit, probe=25):
+    """
+    Return the devices updated at or after the watermark, read newest
+    first. The first window is small (probe) and every next window is
+    twice as big up to the limit, so a steady-state run moves just a few kB.
+    Return None if the DNA Center didn't return the devices sorted.
+    """
+    newer = []
+    previous = None
+    offset, size = 1, min(probe, limit)
+    while True:
+        window = _sorted_window(client, offset, size)
+        for position, device in enumerate(window):
+            update_time = device.get('lastUpdateTime') or 0
+            if previous is not None and update_time > previous:
+                return None
+            previous = update_time
+            if update_time < watermark:
+                # Stop early only if the devices after this one are sorted
+                # too, a DNA Center ignoring sortBy could return an old
+                # device first and the changes would be missed
+                rest = window[position + 1:]
+                if len(window) == size:
+                    rest += _sorted_window(client, offset + size, size)
+                return newer if _is_descending(rest, update_time) else None
+            newer.append(device)
+        if len(window) < size:
+            return newer
+        offset += size
+        size = min(size * 2, limit)
+
+
+def sync(client, snapshot, limit=MAX_LIMIT):
+    """
+    Generator which syncs the snapshot with the DNA Center and yields
+    the added/changed/removed events.
+    """
+    watermark = snapshot.watermark
+    newer = None
+    if watermark is not None:
+        newer = _newer_devices(client, watermark, limit)
+
+    if newer is not None:
+        count = client.get(DEV_COUNT_PATH)['response']
+        added = sum(1 for device in newer if snapshot.get(device['id']) is None)
+        if count != snapshot.count() + added:
+            # Some devices were removed, walk the whole list
+            newer = None
+
+    high_water = watermark or 0
+    if newer is not None:
+        for device in newer:
+            high_water = max(high_water, device.get('lastUpdateTime') or 0)
+            event = _apply(snapshot, device)
+            if event:
+                yield event
+    else:
+        seen = set()
+        for window in _iter_windows(client, limit):
+            for device in window:
+                seen.add(device['id'])
+                high_water = max(high_water, device.get('lastUpdateTime') or 0)
+                event = _apply(snapshot, device)
+                if event:
+                    yield event
+        for device_id in snapshot.ids() - seen:
+            yield _event('removed', snapshot.delete(device_id))
+
+    snapshot.watermark = high_water
+    snapshot.commit()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Incremental DNA Center inventory sync'
+    )
+    parser.add_argument('--db', default='dna_inventory.sqlite',
+                        help='SQLite snapshot file')
+    parser.add_argument('--limit', type=int, default=MAX_LIMIT,
+                        help='number of devices in one window, max. 500')
+    args = parser.parse_args()
+
+    client = DnaClient(token_cache=FileTokenCache())
+
+    # Count the bytes received, to see how much the incremental run saves
+    received = {'requests': 0, 'bytes': 0}
+
+    def count_bytes(response, *args, **kwargs):
+        received['requests'] += 1
+        received['bytes'] += len(response.content)
+
+    client.session.hooks['response'].append(count_bytes)
+
+    snapshot = InventorySnapshot(args.db)
+    for event in sync(client, snapshot, min(args.limit, MAX_LIMIT)):
+        sys.stdout.write(json.dumps(event) + '\n')
+
+    print(f"{snapshot.count()} devices in the snapshot, "
+          f"{received['requests']} requests, {received['bytes']} bytes received",
+          file=sys.stderr)
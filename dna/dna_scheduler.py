@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+"""
+Rate-limit-aware request scheduler for the Cisco DNA Center client
+(see dna_client.py).
+
+The DNA Center intent APIs are throttled per endpoint. When the limit is
+exceeded the API answers with HTTP 429 (Too Many Requests) and the
+Retry-After header with the number of seconds to wait. The get_devices.py
+script raises HTTPError on any non-200 response, which kills the whole
+collection run under load.
+
+The RequestScheduler below:
+  - keeps one token bucket per endpoint, filled with the number of
+    requests allowed per minute, so the requests are throttled before the
+    DNA Center has to reject them
+  - on HTTP 429 pauses the whole endpoint for the Retry-After time
+    (or an exponential backoff if the header is missing) and repeats
+    the request
+  - serves the waiting requests by priority, so the interactive queries
+    (INTERACTIVE) are not starved by a bulk inventory run (BULK)
+  - counts the time spent throttled and the number of 429 responses
+
+Example:
+    from dna_client import DnaClient
+    from dna_scheduler import RequestScheduler, BULK
+    client = DnaClient(scheduler=RequestScheduler())
+    client.get('/intent/api/v1/network-device', priority=BULK)
+    print(client.scheduler.metrics())
+
+The endpoint limits below are the defaults, adjust them to the limits
+documented for your DNA Center release:
+https://developer.cisco.com/docs/dna-center/
+"""
+
+import re
+import time
+import heapq
+import itertools
+import threading
+from email.utils import parsedate_to_datetime
+
+# Priority lanes, lower value is served first
+INTERACTIVE = 0
+BULK = 10
+
+# Allowed requests per minute for each endpoint (path prefix)
+DEFAULT_LIMITS = {
+    '/intent/api/v1/network-device-poller/cli/read-request': 5,
+    '/intent/api/v1/network-device': 100,
+    '/intent/api/v1/interface': 100,
+    '/intent/api/v1/device-health': 100,
+    '/intent/api/v1/task': 100,
+    '/intent/api/v1/file': 100,
+}
+
+# Limit used for the endpoints which are not in the table
+DEFAULT_RATE = 100
+
+# Path segments which are IDs (UUIDs or numbers)
+_ID_SEGMENT = re.compile(r'/([0-9a-f]{8}-[0-9a-f-]{27}|\d+)(?=/|$)', re.IGNORECASE)
+
+
+def retry_after_seconds(value, default):
+    """
+    Convert the Retry-After header value (seconds or HTTP date) to seconds.
+    """
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Token bucket with the waiting requests served by priority.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds):
+        """
+        Don't hand out any token for the given time, e.g. after HTTP 429.
+        """
+        with self._condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self._condition.notify_all()
+
+    def acquire(self, priority=INTERACTIVE):
+        """
+        Wait for a token and return the time spent waiting in seconds.
+        """
+        start = time.monotonic()
+        with self._condition:
+            waiter = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self.paused_until and self._waiters[0] == waiter \
+                            and self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    if now < self.paused_until:
+                        timeout = self.paused_until - now
+                    else:
+                        timeout = max((1 - self.tokens) / self.rate, 0.01)
+                    self._condition.wait(timeout)
+            finally:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+        return time.monotonic() - start
+
+
+class RequestScheduler:
+    """
+    Per-endpoint rate limiting with 429 backoff and priority lanes.
+    """
+
+    def __init__(self, limits=None, default_rate=DEFAULT_RATE, max_retries=5,
+                 backoff=1.0):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._metrics = {}
+
+    def endpoint(self, path):
+        """
+        Return the endpoint of the path - the longest matching prefix from
+        the limits table, or the path with the IDs replaced by {id}.
+        """
+        path = path.split('?')[0]
+        matches = [prefix for prefix in self.limits if path.startswith(prefix)]
+        if matches:
+            return max(matches, key=len)
+        return _ID_SEGMENT.sub('/{id}', path)
+
+    def _bucket(self, endpoint):
+        with self._lock:
+            if endpoint not in self._buckets:
+                rate = self.limits.get(endpoint, self.default_rate)
+                self._buckets[endpoint] = TokenBucket(rate)
+                self._metrics[endpoint] = {
+                    'requests': 0, 'throttled_seconds': 0.0,
+                    'backoff_seconds': 0.0, 'http_429': 0,
+                }
+            return self._buckets[endpoint], self._metrics[endpoint]
+
+    def execute(self, path, send, priority=INTERACTIVE):
+        """
+        Call send() once a token for the endpoint is available and
+        return the response. Repeat the request after HTTP 429.
+        """
+        endpoint = self.endpoint(path)
+        bucket, metrics = self._bucket(endpoint)
+
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire(priority)
+            response = send()
+            with self._lock:
+                metrics['requests'] += 1
+                metrics['throttled_seconds'] += waited
+
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+
+            delay = retry_after_seconds(
+                response.headers.get('Retry-After'), self.backoff * 2 ** attempt
+            )
+            with self._lock:
+                metrics['http_429'] += 1
+                metrics['backoff_seconds'] += delay
+            bucket.pause(delay)
+        return response
+
+    def metrics(self):
+        """
+        Return the metrics of each endpoint.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    key: round(value, 3) if isinstance(value, float) else value
+                    for key, value in metrics.items()
+                }
+                for endpoint, metrics in self._metrics.items()
+            }
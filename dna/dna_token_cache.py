@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+"""
+Token cache for the Cisco DNA Center client (see dna_client.py).
+
+The DNA Center token is valid for one hour, but the get_devices.py script
+used to POST to /dna/system/api/v1/auth/token with the basic auth on every
+run, so a cron job running every minute did 60 logins per hour.
+
+The token caches below store the token together with its issue time and
+return it until shortly before it expires:
+  - MemoryTokenCache  - in-process store for the long-running scripts
+  - FileTokenCache    - JSON file readable only by the owner (0600), so the
+                        token survives between the runs of a script
+
+The tokens are stored per DNA Center URL and username:
+{
+    "https://sandboxdnac.cisco.com/dna devnetuser": {
+        "token": "eyJ0eXAiOiJKV1QiLCJhbGciOiJSUzI1NiJ9...",
+        "issued": 1615700392.454
+    }
+}
+
+If the DNA Center rejects the cached token with HTTP 401 anyway (e.g. after
+a restart), the client removes it from the cache and logs in again.
+"""
+
+import os
+import json
+import time
+import threading
+
+# DNA Center token lifetime in seconds
+TOKEN_LIFETIME = 3600
+
+# Stop using the token this many seconds before it expires
+EXPIRY_MARGIN = 300
+
+# Default location of the token cache file
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.dna_token_cache.json')
+
+
+class MemoryTokenCache:
+    """
+    In-process token cache.
+    """
+
+    def __init__(self, lifetime=TOKEN_LIFETIME, margin=EXPIRY_MARGIN):
+        self.lifetime = lifetime
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def _load(self):
+        return self._tokens
+
+    def _save(self, tokens):
+        self._tokens = tokens
+
+    def get_entry(self, key):
+        """
+        Return the (token, time until which it can be used) of the cached
+        token if it's still valid, otherwise None.
+        """
+        with self._lock:
+            entry = self._load().get(key)
+        if entry:
+            valid_until = entry['issued'] + self.lifetime - self.margin
+            if time.time() < valid_until:
+                return entry['token'], valid_until
+        return None
+
+    def get(self, key):
+        """
+        Return the cached token if it's still valid, otherwise None.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key, token):
+        """
+        Store the token with the current time as its issue time.
+        """
+        with self._lock:
+            tokens = self._load()
+            tokens[key] = {'token': token, 'issued': time.time()}
+            self._save(tokens)
+
+    def delete(self, key):
+        """
+        Remove the token, e.g. after it was rejected with HTTP 401.
+        """
+        with self._lock:
+            tokens = self._load()
+            if tokens.pop(key, None) is not None:
+                self._save(tokens)
+
+
+class FileTokenCache(MemoryTokenCache):
+    """
+    Token cache stored in a JSON file with restricted permissions.
+    """
+
+    def __init__(self, file_name=CACHE_FILE, lifetime=TOKEN_LIFETIME,
+                 margin=EXPIRY_MARGIN):
+        super().__init__(lifetime, margin)
+        self.file_name = file_name
+
+    def _load(self):
+        try:
+            with open(self.file_name) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, tokens):
+        # Write a temporary file readable only by the owner and replace
+        # the cache file with it, so a concurrent run never reads
+        # a half-written file.
+        temp_name = f'{self.file_name}.{os.getpid()}.tmp'
+        fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as cache_file:
+            json.dump(tokens, cache_file)
+        os.replace(temp_name, self.file_name)
@@ -78,86 +78,28 @@ DNA Center Platform API documentation:
 https://developer.cisco.com/docs/dna-center/
 """
 
-import json
-import requests
-
-# As we are working on a non-secured environment we can disable
-# security warnings related to self-signed SSL certificate.
-# Don't disable this in your production environment but rather
-# configure your systems properly and secure.
-from urllib3 import disable_warnings
-from urllib3.exceptions import InsecureRequestWarning
-disable_warnings(InsecureRequestWarning)
+# The DnaClient (see dna_client.py) gets the token via the HTTP POST method
+# with the basic auth and stores it inside the "X-Auth-Token" header.
+# The FileTokenCache (see dna_token_cache.py) keeps the token in a file
+# between the runs of this script, so a new token is requested only once
+# per hour and not on every run.
+from dna_client import DnaClient
+from dna_token_cache import FileTokenCache
 
 
 if __name__ == "__main__":
 
-    # Cisco DNA Center Sandbox
-    BASE_URL = "https://sandboxdnac.cisco.com/dna"
-
-    # URL used to get the auth token
-    AUTH_URL = BASE_URL + '/system/api/v1/auth/token'
-
-    # URL used to get a list of devices
-    DEV_URL = BASE_URL + '/intent/api/v1/network-device'
-
-    # Storing passwords inside your scripts is not recommended but for the demo
-    # purposes it is the easiest way.
-    # One recommended way is to export your credentials as an environment
-    # variables and then use these variables in your script.
-    #
-    # Example:
-    # import os
-    # PASSWORD = os.getenv('MY_SECURE_PASSWORD')
-    #
-    # Here the environment variable is called 'MY_SECURE_PASSWORD' which
-    # contains your secret password.
-    username = "devnetuser"
-    password = "Cisco123!"
-
-    # First we need to get the token via the HTTP POST method
-    # NOTE: verify=False is Not recommended TO USE in a production environment
-    response = requests.post(
-        url=AUTH_URL,
-        auth=(username,password),
-        verify=False
-    )
-
-    # HTTP 200 code is expected if everything is OK, otherwise raise an error.
-    if response.status_code != 200:
-        print(response.text)
-        raise requests.HTTPError(
-            f'Got HTTP {response.status_code} code instead of 200! '\
-            'Please check the response above for more information.'
-        )
-
-    # Token is stored in the response body inside the 'Token' key.
-    token = response.json()['Token']
-
-    # Prepare the headers with the token included.
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Auth-Token': token,
-    }
-
-    # Make the HTTP GET request in order to get a list of all devices
-    # NOTE: verify=False is Not recommended TO USE in a production environment
-    response = requests.get(
-        url=DEV_URL,
-        headers=headers,
-        verify=False
-    )
+    # URL path used to get a list of devices
+    DEV_PATH = '/intent/api/v1/network-device'
 
-    # HTTP 200 code is expected if everything is OK, otherwise raise an error.
-    if response.status_code != 200:
-        print(response.text)
-        raise requests.HTTPError(
-            f'Got HTTP {response.status_code} code instead of 200! '\
-            'Please check the response above for more information.'
-        )
+    # Create the client with the token cache stored in the home directory
+    client = DnaClient(token_cache=FileTokenCache())
 
-    # Store all devices in a dictionary
-    all_devices = response.json()
+    # Make the HTTP GET request in order to get a list of all devices.
+    # HTTP 200 code is expected if everything is OK, otherwise an error
+    # is raised. If the cached token was rejected (HTTP 401), the client
+    # requests a new token and repeats the request.
+    all_devices = client.get(DEV_PATH)
 
     # Get list of hostnames and print the result
     print('Bellow is the list of hostnames found in DNA Center:')
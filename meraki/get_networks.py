@@ -39,94 +39,71 @@ Example of returned data:
 MERAKI DASHBOARD API Learning lab can be accessed here:
 https://developer.cisco.com/learning/lab/meraki-02-dashboard-api/
 
+The items are read page by page by the iterative paginator from the
+meraki_paginator.py script, which follows the RFC5988 Link header, and
+printed as soon as each page is received.
+
+Usage:
+    python get_networks.py
+    python get_networks.py --per-page 2 --limit 10
+    python get_networks.py --no-cache
+
 Meraki Dashboard API documentation:
 https://developer.cisco.com/meraki/api/
 """
 
-import json
-import requests
+import sys
+import argparse
+
+# import the iterative paginator from the meraki_paginator.py script
+from meraki_paginator import iter_items, dump_list, new_session, MAX_PER_PAGE
+# import the rate limiter shared by all the Meraki scripts
+from meraki_rate_limit import shared_limiter
 
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(
+        description='Print all networks of the Meraki organization'
+    )
     # Organization ID 549236 is used in this example but has to be
     # changed according to your organization ID.
     # Please see the example get_organizations.py how to get a list of all
     # organizations.
-    org_id = '549236'
-
-    # MERAKI API URL
-    # only JSON encoding can be used
-    API_URL = f"https://api.meraki.com/api/v0/organizations/{org_id}/networks"
-
-    # Get the token via your Meraki dashboard webpage
-    # Storing passwords inside your scripts is not recommended but for the demo
-    # purposes it is the easiest way.
-    # One recommended way is to export your credentials as an environment
-    # variables and then use these variables in your script.
-    #
-    # Example:
-    # import os
-    # PASSWORD = os.getenv('MY_SECURE_PASSWORD')
-    #
-    # Here the environment variable is called 'MY_SECURE_PASSWORD' which
-    # contains your secret password.
-    token = "6bec40cf957de430a6f1f2baa056b99a4fac9ea0"
-
-    # Prepare the headers for the HTTP GET message
-    # with the token included.
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Cisco-Meraki-API-Key': token,
-    }
-
-    # In order to see the pagination funtion in action, we can use params
-    # and configure to get only 2 devices per HTTP GET request.
-    params = {
-        'per_page': 2
-    }
-
-    # make a global list of all networks
-    networks_list = []
-    def _get_data(**kwargs) -> None:
-        """
-        Internal recursion function to make the HTTP GET request and
-        update the global list named networks_list.
-        This function handles pagination recursively via calling itself.
-        """
-        # Make the HTTP GET request to get all networks
-        response = requests.get(**kwargs)
-        print(f"HTTP GET: {response.url}")
-
-        # Raise an exception if the response is not OK
-        if not response.ok:
-            print(response.text)
-            response.raise_for_status()
-
-        # Extend the global list networks_list with the response data
-        networks_list.extend(response.json())
-
-        # Pagination
-        # Meraki Dashboard APIs implement the RFC5988 - Web Linking standard
-        # for pagination.
-        # By default, the Meraki Dashboard API returns a maximum of 1000 items
-        # prior to requiring pagination.
-        # In the HTTP Response, an HTTP Header called Link contains information
-        # on how to retrieve additional items from the Meraki Dashboard API.
-        # First we need to check if the header contains the next key:
-        if response.links.get('next'):
-            next_url = response.links['next'].get('url')
-            kwargs['url'] = next_url
-            _get_data(**kwargs)
-
-    # Make the HTTP GET request
-    # Calling this function the global list variable networks_list will be
-    # filled-in with all networks information.
-    _get_data(
-        url=API_URL,
-        headers=headers,
-        params=params
+    parser.add_argument('--org-id', default='549236', help='organization ID')
+    # In order to see the pagination function in action, we can request
+    # only 2 networks per HTTP GET request with --per-page 2.
+    parser.add_argument('--per-page', type=int, default=MAX_PER_PAGE,
+                        help='number of networks in one page, max. 1000')
+    parser.add_argument('--limit', type=int,
+                        help='stop after this number of networks')
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't use the on-disk HTTP cache")
+    args = parser.parse_args()
+
+    # Pagination
+    # Meraki Dashboard APIs implement the RFC5988 - Web Linking standard
+    # for pagination. The iter_items() generator follows the next links
+    # in a loop and yields the networks one by one, so only one page is kept
+    # in memory.
+    # The rate limiter keeps the requests within the organization budget,
+    # also when other Meraki scripts are running at the same time, and
+    # pauses the requests after HTTP 429 for the Retry-After time.
+    limiter = shared_limiter()
+    # The networks barely change, so the pages are kept in the on-disk
+    # HTTP cache and downloaded again only if they changed or expired.
+    session = new_session(cache=not args.no_cache)
+    networks = iter_items(
+        f'/organizations/{args.org_id}/networks',
+        session=session,
+        per_page=args.per_page,
+        limit=args.limit,
+        verbose=True,
+        throttle=lambda: limiter.acquire(args.org_id),
+        backoff=lambda delay: limiter.backoff(args.org_id, delay)
     )
 
     # Print all networks
-    print(json.dumps(networks_list, indent=4))
+    dump_list(networks, sys.stdout)
+    if not args.no_cache:
+        print(f'HTTP cache: {session.cache.stats}', file=sys.stderr)
@@ -26,6 +26,10 @@ Example of returned data:
    }
 ]
 
+The organizations barely change, so the response is kept in an on-disk
+HTTP cache (see common/http_cache.py) and the next run downloads it again
+only if it changed or the cached copy is older than the TTL.
+
 MERAKI DASHBOARD API Learning lab can be accessed here:
 https://developer.cisco.com/learning/lab/meraki-02-dashboard-api/
 
@@ -33,8 +37,11 @@ Meraki Dashboard API documentation:
 https://developer.cisco.com/meraki/api/
 """
 
+import sys
 import json
-import requests
+
+# import the session factory from the meraki_paginator.py script
+from meraki_paginator import new_session
 
 
 if __name__ == "__main__":
@@ -57,18 +64,12 @@ if __name__ == "__main__":
     # contains your secret password.
     token = "6bec40cf957de430a6f1f2baa056b99a4fac9ea0"
 
-    # Prepare the headers for the HTTP GET message
-    # with the token included.
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Cisco-Meraki-API-Key': token,
-    }
+    # The session sends the token in the headers of every HTTP GET message
+    # and serves the requests from the on-disk HTTP cache
+    session = new_session(token=token, cache=True)
 
     # Make the HTTP GET request to get all organizations
-    response = requests.get(
-        url=API_URL,
-        headers=headers
-    )
+    response = session.get(url=API_URL)
 
     # Raise an exception if the response is not OK
     if not response.ok:
@@ -80,3 +81,4 @@ if __name__ == "__main__":
 
     # Print all organizations
     print(json.dumps(orgs, indent=4))
+    print(f"HTTP cache: {response.headers.get('X-Cache')}", file=sys.stderr)
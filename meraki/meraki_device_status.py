@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+This script will retrieve the status and uplinks of all devices within an
+organization via the organization-wide bulk endpoints of the Meraki
+Dashboard API.
+
+Asking for the status of every device from the get_devices.py list one by
+one costs one API call per device, i.e. thousands of calls (and a lot of
+the 10 calls per second budget) for a large organization. The bulk
+endpoints return the statuses of all devices of the organization in pages
+of up to 1000 devices:
+/api/v1/organizations/<organizationId>/devices/statuses
+/api/v1/organizations/<organizationId>/uplinks/statuses
+
+so a full refresh takes just a few paged calls. Both lists are loaded into
+a hash index by the device serial number, and then the device records are
+streamed (see meraki_paginator.py) and joined with their status and uplinks
+one by one.
+
+Example of the joined record:
+{
+    "serial": "Q2EK-S3AA-BXFW",
+    "name": "",
+    "model": "MR84",
+    "networkId": "L_646829496481107723",
+    "lanIp": "192.168.128.3",
+    ...
+    "status": {
+        "status": "online",
+        "lastReportedAt": "2021-03-14T05:39:52.000Z",
+        "publicIp": "209.206.40.173",
+        ...
+    },
+    "uplinks": [
+        {"interface": "wan1", "status": "active", "ip": "192.168.128.3", ...}
+    ]
+}
+
+The devices without any status or uplink record get null and [].
+
+Usage:
+    python meraki_device_status.py
+    python meraki_device_status.py --org-id 549236 > statuses.json
+
+Meraki Dashboard API documentation:
+https://developer.cisco.com/meraki/api-v1/
+"""
+
+import sys
+import argparse
+
+from meraki_paginator import iter_items, dump_list, API_URL
+from meraki_rate_limit import shared_limiter
+
+# The bulk status endpoints are available in the v1 API only
+API_V1_URL = API_URL.replace('/api/v0', '/api/v1')
+
+DEVICE_STATUSES_PATH = '/organizations/{org_id}/devices/statuses'
+UPLINK_STATUSES_PATH = '/organizations/{org_id}/uplinks/statuses'
+
+
+def index_by_serial(records):
+    """
+    Return the dict (hash index) of the records by the serial number.
+    """
+    return {record['serial']: record for record in records if record.get('serial')}
+
+
+def join_statuses(devices, org_id, session=None, throttle=None, backoff=None):
+    """
+    Generator which yields the device records joined with their status
+    and uplinks from the organization-wide bulk endpoints.
+    """
+    def bulk(path):
+        return iter_items(
+            API_V1_URL + path.format(org_id=org_id), session,
+            throttle=throttle, backoff=backoff
+        )
+
+    statuses = index_by_serial(bulk(DEVICE_STATUSES_PATH))
+    uplinks = index_by_serial(bulk(UPLINK_STATUSES_PATH))
+
+    for device in devices:
+        serial = device.get('serial')
+        record = dict(device)
+        record['status'] = statuses.get(serial)
+        record['uplinks'] = uplinks.get(serial, {}).get('uplinks', [])
+        yield record
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Status and uplinks of all devices of the Meraki organization'
+    )
+    # Organization ID 549236 is used in this example but has to be
+    # changed according to your organization ID.
+    parser.add_argument('--org-id', default='549236', help='organization ID')
+    args = parser.parse_args()
+
+    limiter = shared_limiter()
+
+    def throttle():
+        limiter.acquire(args.org_id)
+
+    def backoff(delay):
+        limiter.backoff(args.org_id, delay)
+
+    devices = iter_items(
+        f'/organizations/{args.org_id}/devices', throttle=throttle, backoff=backoff
+    )
+    dump_list(join_statuses(devices, args.org_id, throttle=throttle, backoff=backoff))
+
+    print(f'{limiter.requests} API calls in total', file=sys.stderr)
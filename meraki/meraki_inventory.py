@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+This script will retrieve the networks and devices of all organizations
+accessible with the API key via the Meraki Dashboard API.
+
+The get_networks.py and get_devices.py scripts read just one organization
+(ID 549236) each. Here the organizations are listed first:
+/api/v0/organizations
+
+and then the networks and devices of every organization are read
+concurrently by a pool of worker threads:
+/api/v0/organizations/<organizationId>/networks
+/api/v0/organizations/<organizationId>/devices
+
+All the workers share one pooled session (see meraki_paginator.py) and one
+rate limiter (see meraki_rate_limit.py), which keeps the calls within the
+per-organization and per-API-key budgets, so the Meraki Dashboard doesn't
+have to reject them with HTTP 429. If it does, the organization is paused
+for the Retry-After time and the request is repeated. The budget is shared
+with other collectors running at the same time via the rate limiter state
+file.
+
+If one organization fails (e.g. the API is disabled for it), the error is
+recorded in its entry and the other organizations are still collected.
+
+Example of returned data:
+{
+    "organizations": {
+        "549236": {
+            "name": "DevNet Sandbox",
+            "networks": [{"id": "L_646829496481105433", ...}, ...],
+            "devices": [{"serial": "Q2EK-S3AA-BXFW", ...}, ...],
+            "requests": 2,
+            "seconds": 0.412
+        },
+        ...
+    },
+    "seconds": 3.201
+}
+
+Usage:
+    python meraki_inventory.py > inventory.json
+    python meraki_inventory.py --workers 16
+
+Meraki Dashboard API documentation:
+https://developer.cisco.com/meraki/api/
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from meraki_paginator import iter_items, new_session
+from meraki_rate_limit import RateLimiter, shared_limiter
+
+
+def fetch_organization(org, session, limiter):
+    """
+    Read the networks and devices of one organization and return them
+    with the number of requests and the time it took.
+    """
+    org_id = org['id']
+    requests_made = 0
+
+    def throttle():
+        nonlocal requests_made
+        requests_made += 1
+        limiter.acquire(org_id)
+
+    start = time.perf_counter()
+    entry = {'name': org.get('name')}
+    try:
+        for resource in ('networks', 'devices'):
+            entry[resource] = list(iter_items(
+                f'/organizations/{org_id}/{resource}', session,
+                throttle=throttle, backoff=lambda delay: limiter.backoff(org_id, delay)
+            ))
+    except requests.RequestException as error:
+        entry['error'] = str(error)
+    entry['requests'] = requests_made
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return org_id, entry
+
+
+def fetch_inventory(session=None, limiter=None, workers=8):
+    """
+    Read the networks and devices of all the organizations concurrently
+    and return the merged inventory.
+    """
+    session = session or new_session(pool_size=workers)
+    limiter = limiter or RateLimiter()
+
+    start = time.perf_counter()
+    organizations = list(iter_items(
+        '/organizations', session,
+        throttle=limiter.acquire, backoff=lambda delay: limiter.backoff(None, delay)
+    ))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda org: fetch_organization(org, session, limiter), organizations
+        )
+        inventory = {'organizations': dict(results)}
+    inventory['seconds'] = round(time.perf_counter() - start, 3)
+    return inventory
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Networks and devices of all Meraki organizations'
+    )
+    parser.add_argument('--workers', type=int, default=8,
+                        help='number of organizations read at the same time')
+    args = parser.parse_args()
+
+    limiter = shared_limiter()
+    inventory = fetch_inventory(limiter=limiter, workers=args.workers)
+    print(json.dumps(inventory, indent=4))
+
+    # Print the timing of each organization
+    for org_id, entry in inventory['organizations'].items():
+        status = entry.get('error') or (
+            f"{len(entry['networks'])} networks, {len(entry['devices'])} devices"
+        )
+        print(f"{org_id}: {status}, {entry['requests']} requests "
+              f"in {entry['seconds']}s", file=sys.stderr)
+    print(f"{len(inventory['organizations'])} organizations in "
+          f"{inventory['seconds']}s, {limiter.waited:.2f}s waited for the "
+          f"rate limiter, {limiter.http_429} x HTTP 429", file=sys.stderr)
+    print(json.dumps(limiter.usage(), indent=4), file=sys.stderr)
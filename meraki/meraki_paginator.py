@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+Iterative paginator for the Meraki Dashboard API list endpoints.
+
+Meraki Dashboard APIs implement the RFC5988 - Web Linking standard for
+pagination. The list endpoints return at most "per_page" items (up to 1000)
+and the HTTP header called Link contains the URL of the next page:
+
+Link: <https://api.meraki.com/api/v0/organizations/549236/devices?
+       perPage=2&startingAfter=Q2EK-S3AA-BXFW>; rel=next
+
+The get_devices.py and get_networks.py scripts used to follow the next link
+by a recursive function, so every page added one stack frame (the script
+failed with RecursionError for a large organization and per_page=2) and all
+the pages were kept in memory until the last one was received.
+
+The iter_items() generator below follows the next links in a loop over one
+shared requests.Session() with a keep-alive connection pool and yields the
+items one by one, so only one page is kept in memory and there is no limit
+on the number of pages. The caller can stop reading at any time, e.g. with
+the limit argument, and no other page is requested.
+
+The organization and network lists barely change, so the session can
+cache the GET responses on the disk (see common/http_cache.py).
+
+When the Meraki Dashboard answers with HTTP 429 (Too Many Requests), the
+request is repeated after the time from the Retry-After header. The
+throttle and backoff arguments connect the paginator to a rate limiter
+(see meraki_rate_limit.py).
+
+Example:
+    from meraki_paginator import iter_items
+    for device in iter_items(f'/organizations/{org_id}/devices', limit=10):
+        print(device['serial'])
+
+Meraki Dashboard API documentation:
+https://developer.cisco.com/meraki/api/
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# The HTTP cache is in the common directory, shared with the Webex scripts.
+# The Meraki scripts use it only via new_session(cache=True).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from http_cache import CachingAdapter, HttpCache  # noqa: E402
+
+# MERAKI API URL
+# only JSON encoding can be used
+API_URL = "https://api.meraki.com/api/v0"
+
+# Get the token via your Meraki dashboard webpage
+# Storing passwords inside your scripts is not recommended but for the demo
+# purposes it is the easiest way.
+# One recommended way is to export your credentials as an environment
+# variables and then use these variables in your script.
+#
+# Example:
+# import os
+# PASSWORD = os.getenv('MY_SECURE_PASSWORD')
+#
+# Here the environment variable is called 'MY_SECURE_PASSWORD' which
+# contains your secret password.
+TOKEN = "6bec40cf957de430a6f1f2baa056b99a4fac9ea0"
+
+# Max. number of items the Meraki Dashboard API returns in one page
+MAX_PER_PAGE = 1000
+
+# Query parameter with the page size, the v1 API renamed it
+PAGE_SIZE_PARAMS = {'v0': 'per_page', 'v1': 'perPage'}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def new_session(token=TOKEN, pool_size=10, cache=False):
+    """
+    Return a new session with the token and a keep-alive connection pool.
+    If cache is True, the GET responses are cached on the disk (see
+    http_cache.py) and the statistics are in session.cache.stats.
+    """
+    session = requests.Session()
+    if cache:
+        adapter = CachingAdapter(HttpCache(), pool_connections=1, pool_maxsize=pool_size)
+        session.cache = adapter.cache
+    else:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # The token is encoded inside the "X-Cisco-Meraki-API-Key" header field
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'X-Cisco-Meraki-API-Key': token,
+    })
+    return session
+
+
+def get_session():
+    """
+    Return the session shared by all the Meraki scripts.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+def retry_after_seconds(response, attempt):
+    """
+    Return the seconds to wait after HTTP 429 - the Retry-After header value
+    or an exponential backoff if the header is missing.
+    """
+    try:
+        return max(float(response.headers['Retry-After']), 0.0)
+    except (KeyError, ValueError):
+        return float(2 ** attempt)
+
+
+def page_size_param(url):
+    """
+    Return the name of the page size query parameter of the API version
+    in the URL.
+    """
+    return PAGE_SIZE_PARAMS['v1' if '/api/v1/' in url else 'v0']
+
+
+def iter_pages(path, session=None, per_page=MAX_PER_PAGE, params=None, verbose=False,
+               throttle=None, backoff=None, max_retries=5):
+    """
+    Generator which yields the items list of each page, following the
+    RFC5988 next links until the last page is reached. The throttle
+    function (if any) is called before every request, e.g. to wait for
+    the rate limiter. After HTTP 429 the backoff function is called with
+    the seconds to wait (or the generator just sleeps) and the request is
+    repeated up to max_retries times.
+    """
+    session = session or get_session()
+    url = path if path.startswith('http') else API_URL + path
+    params = dict(params or {})
+    params[page_size_param(url)] = min(per_page, MAX_PER_PAGE)
+
+    while url:
+        for attempt in range(max_retries + 1):
+            if throttle:
+                throttle()
+            response = session.get(url, params=params)
+            if verbose:
+                print(f"HTTP GET: {response.url} {response.status_code}", file=sys.stderr)
+            if response.status_code != 429 or attempt == max_retries:
+                break
+
+            delay = retry_after_seconds(response, attempt)
+            if backoff:
+                backoff(delay)
+            # The rate limiter waits for the pause itself in throttle()
+            if not throttle or not backoff:
+                time.sleep(delay)
+
+        # Raise an exception if the response is not OK
+        if not response.ok:
+            print(response.text)
+            response.raise_for_status()
+
+        yield response.json()
+
+        # The next link already contains all the query parameters
+        url = response.links.get('next', {}).get('url')
+        params = None
+
+
+def iter_items(path, session=None, per_page=MAX_PER_PAGE, params=None, limit=None,
+               verbose=False, throttle=None, backoff=None):
+    """
+    Generator which yields the items one by one. If the limit is given,
+    stop after that many items without requesting the next page.
+    """
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    for page in iter_pages(path, session, per_page, params, verbose, throttle, backoff):
+        for item in page:
+            yield item
+            count += 1
+            if count == limit:
+                return
+
+
+def dump_list(items, file=sys.stdout, indent=4):
+    """
+    Write the items as one JSON list, one item after the other, so the
+    whole list is never kept in memory.
+    """
+    file.write('[')
+    separator = '\n'
+    for item in items:
+        text = json.dumps(item, indent=indent)
+        if indent:
+            text = text.replace('\n', '\n' + ' ' * indent)
+        file.write(separator + ' ' * (indent or 0) + text)
+        separator = ',\n'
+    file.write('\n]\n' if separator != '\n' else ']\n')
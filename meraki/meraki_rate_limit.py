@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+"""
+Shared rate limiter for the Meraki Dashboard API.
+
+The Meraki Dashboard API limits the number of calls:
+  - per organization, 10 calls per second
+  - per API key (and source IP), shared by all the organizations
+When a limit is exceeded, the API answers with HTTP 429 (Too Many Requests)
+and the Retry-After header with the number of seconds to wait.
+
+The RateLimiter below keeps one token bucket for every organization and one
+for the API key. A request takes a token from both buckets, so concurrent
+workers collecting many organizations never exceed either budget. After
+HTTP 429, backoff() pauses the bucket of the organization for the
+Retry-After time, so no worker sends another request to it until then.
+
+The FileRateLimiter keeps the buckets in a shared state file locked with
+fcntl.flock() (msvcrt.locking() on Windows), so several collector processes
+running at the same time (e.g. get_devices.py and meraki_inventory.py
+started by cron) share one budget as well. The state file is tiny, it's
+read and written once per request. It's kept in the cache directory of the
+user (~/.cache or %LOCALAPPDATA%), not in the shared temp directory.
+
+shared_limiter() returns the FileRateLimiter, or the in-process RateLimiter
+if the state file can't be locked or created.
+
+usage() shows how close the collectors are running to the budget, e.g.:
+{
+    "key": {"rate": 100, "used": 0.12, "paused": 0.0},
+    "549236": {"rate": 10, "used": 0.9, "paused": 0.0}
+}
+where "used" is the part of the burst capacity already spent.
+
+Example:
+    from meraki_paginator import iter_items
+    from meraki_rate_limit import shared_limiter
+    limiter = shared_limiter()
+    for device in iter_items(f'/organizations/{org_id}/devices',
+                             throttle=lambda: limiter.acquire(org_id),
+                             backoff=lambda delay: limiter.backoff(org_id, delay)):
+        print(device['serial'])
+    print(limiter.usage())
+
+Meraki Dashboard API documentation:
+https://developer.cisco.com/meraki/api/#/rest/guides/rate-limit
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# File locking is platform specific
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Allowed calls per second
+PER_ORG_RATE = 10
+PER_KEY_RATE = 100
+
+# Name of the API key bucket
+KEY_SCOPE = 'key'
+
+# Name of the shared state file in the cache directory of the user
+STATE_FILE = 'meraki_rate_limit.json'
+
+
+def state_file_name():
+    """
+    Return the path of the shared state file in the cache directory
+    of the user.
+    """
+    cache_dir = (os.environ.get('LOCALAPPDATA') if os.name == 'nt'
+                 else os.environ.get('XDG_CACHE_HOME'))
+    cache_dir = cache_dir or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, STATE_FILE)
+
+
+def _lock_file(file):
+    if fcntl:
+        fcntl.flock(file, fcntl.LOCK_EX)
+    else:
+        # The first byte is locked, LK_LOCK retries for about 10 seconds
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(file):
+    if fcntl:
+        fcntl.flock(file, fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class RateLimiter:
+    """
+    Thread safe per-organization and per-API-key rate limiter.
+    """
+
+    def __init__(self, per_org=PER_ORG_RATE, per_key=PER_KEY_RATE):
+        self.per_org = per_org
+        self.per_key = per_key
+        self.waited = 0.0
+        self.requests = 0
+        self.http_429 = 0
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def _buckets(self):
+        """
+        Context manager which yields the state of the buckets locked.
+        """
+        with self._lock:
+            yield self._state
+
+    def _bucket(self, state, scope, now):
+        """
+        Return the bucket of the scope, refilled up to now.
+        """
+        rate = self.per_key if scope == KEY_SCOPE else self.per_org
+        bucket = state.setdefault(
+            scope, {'tokens': float(rate), 'updated': now, 'paused_until': 0.0}
+        )
+        bucket['tokens'] = min(rate, bucket['tokens'] + (now - bucket['updated']) * rate)
+        bucket['updated'] = now
+        return bucket, rate
+
+    def acquire(self, org_id=None):
+        """
+        Wait until both the organization and the API key budget allow one
+        more call and return the time spent waiting in seconds.
+        """
+        scopes = [KEY_SCOPE] if org_id is None else [KEY_SCOPE, str(org_id)]
+        start = time.time()
+        while True:
+            with self._buckets() as state:
+                now = time.time()
+                delay = 0.0
+                buckets = []
+                for scope in scopes:
+                    bucket, rate = self._bucket(state, scope, now)
+                    buckets.append(bucket)
+                    delay = max(delay, bucket['paused_until'] - now,
+                                (1 - bucket['tokens']) / rate)
+
+                # Take the token only if all the buckets have one
+                if delay <= 0:
+                    for bucket in buckets:
+                        bucket['tokens'] -= 1
+                    break
+            time.sleep(delay)
+
+        waited = time.time() - start
+        with self._lock:
+            self.waited += waited
+            self.requests += 1
+        return waited
+
+    def backoff(self, org_id, delay):
+        """
+        Pause the organization (or the whole API key if org_id is None)
+        for the given seconds after HTTP 429.
+        """
+        scope = KEY_SCOPE if org_id is None else str(org_id)
+        with self._buckets() as state:
+            now = time.time()
+            bucket, _ = self._bucket(state, scope, now)
+            bucket['paused_until'] = max(bucket['paused_until'], now + delay)
+            bucket['tokens'] = 0.0
+        with self._lock:
+            self.http_429 += 1
+
+    def usage(self):
+        """
+        Return the part of the budget used and the remaining pause of every
+        bucket.
+        """
+        with self._buckets() as state:
+            now = time.time()
+            usage = {}
+            for scope in list(state):
+                bucket, rate = self._bucket(state, scope, now)
+                usage[scope] = {
+                    'rate': rate,
+                    'used': round(1 - max(bucket['tokens'], 0.0) / rate, 3),
+                    'paused': round(max(bucket['paused_until'] - now, 0.0), 3),
+                }
+            return usage
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    Rate limiter shared by all the processes using the same state file.
+    """
+
+    def __init__(self, file_name=None, per_org=PER_ORG_RATE, per_key=PER_KEY_RATE):
+        if fcntl is None and msvcrt is None:
+            raise OSError('File locking is not available on this platform')
+        super().__init__(per_org, per_key)
+        self.file_name = file_name or state_file_name()
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+
+    @contextmanager
+    def _buckets(self):
+        with self._lock, open(self.file_name, 'a+') as file:
+            _lock_file(file)
+            try:
+                file.seek(0)
+                try:
+                    state = json.loads(file.read() or '{}')
+                except ValueError:
+                    state = {}
+                yield state
+
+                # Drop the idle buckets, they are full again anyway
+                now = time.time()
+                state = {
+                    scope: bucket for scope, bucket in state.items()
+                    if bucket['tokens'] < (self.per_key if scope == KEY_SCOPE
+                                           else self.per_org)
+                    or bucket['paused_until'] > now
+                }
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state))
+                file.flush()
+            finally:
+                _unlock_file(file)
+
+
+def shared_limiter(file_name=None, per_org=PER_ORG_RATE, per_key=PER_KEY_RATE):
+    """
+    Return the rate limiter shared by all the processes, or the in-process
+    one if the state file can't be locked or created.
+    """
+    try:
+        return FileRateLimiter(file_name, per_org, per_key)
+    except OSError:
+        return RateLimiter(per_org, per_key)
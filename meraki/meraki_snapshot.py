@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+"""
+This script will take snapshots of the Meraki organization device list
+and show what changed between two snapshots.
+
+Comparing the json.dumps() output of get_devices.py from two runs by hand
+doesn't scale, and comparing two device lists in Python needs both of them
+in memory and a deep comparison of every device.
+
+A snapshot is an NDJSON file with one line per device, sorted by the serial
+number, with the content hash of the device record:
+{"serial": "Q2EK-S3AA-BXFW", "hash": "5b7c...", "record": {"serial": ...}}
+
+The devices are sorted on the disk (sorted chunks merged together), so even
+a huge organization is never loaded into memory at once. A device without
+the serial number is skipped and a serial which appears more than once
+is written just once, both with a warning.
+
+Two snapshots are compared by one pass over both files at the same time
+(merge join by the serial number), so the diff is O(n) and it needs memory
+for just two lines:
+  - a serial only in the old snapshot is a removed device
+  - a serial only in the new snapshot is an added device
+  - a serial in both with a different hash is a changed device, only then
+    the two records are compared field by field
+
+Example of the diff events (one JSON object per line):
+{"event": "added", "serial": "Q2EK-S3AA-BXFW", "changes": {}}
+{"event": "removed", "serial": "Q2EK-S3AA-BXFW", "changes": {}}
+{"event": "changed", "serial": "Q2EK-S3AA-BXFW", "changes": {
+    "firmware": ["wireless-27-6", "wireless-28-5"],
+    "lanIp": ["192.168.128.3", "192.168.128.7"]}}
+where every changed field has the [old, new] values.
+
+Usage:
+    python meraki_snapshot.py take devices-10h.ndjson --org-id 549236
+    python meraki_snapshot.py take devices-11h.ndjson --from-file devices.json
+    python meraki_snapshot.py diff devices-10h.ndjson devices-11h.ndjson
+
+Meraki Dashboard API documentation:
+https://developer.cisco.com/meraki/api/
+"""
+
+import os
+import sys
+import json
+import heapq
+import hashlib
+import argparse
+import tempfile
+
+# Number of devices sorted in memory at once when taking a snapshot
+CHUNK_SIZE = 10000
+
+
+def content_hash(record):
+    """
+    Return the hash of the device record.
+    """
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+def _snapshot_line(record):
+    return json.dumps({
+        'serial': record['serial'],
+        'hash': content_hash(record),
+        'record': record,
+    }) + '\n'
+
+
+def _write_sorted(lines, file_name):
+    """
+    Write the sorted (serial, line) pairs, the first line of every serial
+    only. Return the number of lines written and of duplicates dropped.
+    """
+    written = duplicates = 0
+    previous = None
+    with open(file_name, 'w') as snapshot_file:
+        for serial, line in lines:
+            if serial == previous:
+                duplicates += 1
+                continue
+            previous = serial
+            snapshot_file.write(line)
+            written += 1
+    return written, duplicates
+
+
+def write_snapshot(devices, file_name, chunk_size=CHUNK_SIZE):
+    """
+    Write the devices sorted by the serial number into the snapshot file
+    and return the number of devices. Only chunk_size devices are kept in
+    memory, the sorted chunks are merged from temporary files.
+    """
+    chunk_files = []
+    chunk = []
+    skipped = duplicates = 0
+    directory = os.path.dirname(os.path.abspath(file_name))
+    try:
+        for device in devices:
+            if not device.get('serial'):
+                skipped += 1
+                continue
+            chunk.append((device['serial'], _snapshot_line(device)))
+            if len(chunk) == chunk_size:
+                fd, chunk_name = tempfile.mkstemp(suffix='.chunk', dir=directory)
+                os.close(fd)
+                chunk_files.append(chunk_name)
+                duplicates += _write_sorted(sorted(chunk), chunk_name)[1]
+                chunk = []
+
+        if not chunk_files:
+            count, dropped = _write_sorted(sorted(chunk), file_name)
+        else:
+            opened = [open(chunk_name) for chunk_name in chunk_files]
+            try:
+                streams = [
+                    ((json.loads(line)['serial'], line) for line in chunk_file)
+                    for chunk_file in opened
+                ]
+                count, dropped = _write_sorted(
+                    heapq.merge(sorted(chunk), *streams), file_name
+                )
+            finally:
+                for chunk_file in opened:
+                    chunk_file.close()
+    finally:
+        for chunk_name in chunk_files:
+            os.remove(chunk_name)
+
+    duplicates += dropped
+    if skipped:
+        print(f'WARNING: {skipped} devices without a serial number skipped',
+              file=sys.stderr)
+    if duplicates:
+        print(f'WARNING: {duplicates} duplicate serial numbers dropped',
+              file=sys.stderr)
+    return count
+
+
+def read_snapshot(file_name):
+    """
+    Generator which yields the (serial, hash, line) of each device and
+    checks that the snapshot is sorted.
+    """
+    previous = None
+    with open(file_name) as snapshot_file:
+        for line in snapshot_file:
+            entry = json.loads(line)
+            serial = entry['serial']
+            if previous is not None and serial <= previous:
+                raise ValueError(f'{file_name} is not sorted by serial at {serial}')
+            previous = serial
+            yield serial, entry['hash'], entry['record']
+
+
+def changed_fields(old, new):
+    """
+    Return the {field: [old, new]} of the fields which differ.
+    """
+    return {
+        key: [old.get(key), new.get(key)]
+        for key in sorted(set(old) | set(new))
+        if old.get(key) != new.get(key)
+    }
+
+
+def diff(old_file, new_file):
+    """
+    Generator which yields the added/removed/changed events by one merge
+    join pass over both snapshots.
+    """
+    old_entries = read_snapshot(old_file)
+    new_entries = read_snapshot(new_file)
+    old = next(old_entries, None)
+    new = next(new_entries, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield {'event': 'removed', 'serial': old[0], 'changes': {}}
+            old = next(old_entries, None)
+        elif old is None or new[0] < old[0]:
+            yield {'event': 'added', 'serial': new[0], 'changes': {}}
+            new = next(new_entries, None)
+        else:
+            if old[1] != new[1]:
+                yield {'event': 'changed', 'serial': new[0],
+                       'changes': changed_fields(old[2], new[2])}
+            old = next(old_entries, None)
+            new = next(new_entries, None)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Take and compare snapshots of the Meraki device list'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    take = commands.add_parser('take', help='write a new snapshot')
+    take.add_argument('snapshot', help='snapshot file to write')
+    # Organization ID 549236 is used in this example but has to be
+    # changed according to your organization ID.
+    take.add_argument('--org-id', default='549236', help='organization ID')
+    take.add_argument('--from-file',
+                      help='JSON device list saved from get_devices.py '
+                           'instead of the API')
+
+    compare = commands.add_parser('diff', help='compare two snapshots')
+    compare.add_argument('old', help='older snapshot file')
+    compare.add_argument('new', help='newer snapshot file')
+    args = parser.parse_args()
+
+    if args.command == 'take':
+        if args.from_file:
+            with open(args.from_file) as devices_file:
+                devices = json.load(devices_file)
+        else:
+            from meraki_paginator import iter_items
+            from meraki_rate_limit import shared_limiter
+            # The same organization budget as the other Meraki scripts
+            limiter = shared_limiter()
+            devices = iter_items(
+                f'/organizations/{args.org_id}/devices',
+                throttle=lambda: limiter.acquire(args.org_id),
+                backoff=lambda delay: limiter.backoff(args.org_id, delay)
+            )
+        count = write_snapshot(devices, args.snapshot)
+        print(f'{count} devices written to {args.snapshot}', file=sys.stderr)
+    else:
+        counts = {'added': 0, 'removed': 0, 'changed': 0}
+        for event in diff(args.old, args.new):
+            counts[event['event']] += 1
+            sys.stdout.write(json.dumps(event) + '\n')
+        print(', '.join(f'{count} {name}' for name, count in counts.items()),
+              file=sys.stderr)
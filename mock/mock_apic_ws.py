@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+Local fake APIC with the event WebSocket, used to test the APIC query
+subscriptions (see apic/apic_subscribe.py) without the sandbox.
+
+The mock_server.py server replays plain HTTP fixtures only. The fake APIC
+below keeps the MO objects in memory and implements:
+  - POST /api/aaaLogin.json, GET /api/aaaRefresh.json   - fixed token
+  - GET  /api/node/class/<class>.json[?subscription=yes]
+                                      - the objects and the subscriptionId
+  - GET  /api/subscriptionRefresh.json?id=<subscriptionId>
+                                      - HTTP 400 for an unknown (expired) ID
+  - GET  /socket<token>               - the WebSocket (RFC 6455, text frames)
+
+The test changes the objects via set() and delete(). The change is pushed
+over every open WebSocket to the subscriptions of the class, the same way
+as the APIC does it:
+{"subscriptionId": ["1"], "imdata": [{"fvTenant": {"attributes": {
+    "dn": "uni/tn-Tenant1", "descr": "new", "status": "modified"}}}]}
+
+With push=False the object is changed silently, and expire_subscriptions()
+drops all the subscription IDs, which simulates a subscription which timed
+out, e.g. while the subscriber couldn't reach the APIC. drop_sockets()
+closes all the open WebSockets and drops their subscriptions, the same as
+a network outage or an APIC restart.
+
+Example:
+    from mock_apic_ws import FakeApic
+    apic = FakeApic().start()
+    apic.set('fvTenant', {'dn': 'uni/tn-Tenant1', 'descr': ''})
+    client = ApicClient(base_url=apic.url)
+    subscriber = ApicSubscriber(['fvTenant'], client=client)
+
+Usage:
+    python mock_apic_ws.py [--port 8080]
+"""
+
+import json
+import base64
+import socket
+import struct
+import hashlib
+import argparse
+import itertools
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+TOKEN = 'fake-apic-token'
+
+# Magic value of the WebSocket handshake (RFC 6455, section 1.3)
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def ws_frame(text):
+    """
+    Return the unmasked WebSocket text frame with the text.
+    """
+    data = text.encode('utf-8')
+    if len(data) < 126:
+        header = struct.pack('!BB', 0x81, len(data))
+    elif len(data) < 65536:
+        header = struct.pack('!BBH', 0x81, 126, len(data))
+    else:
+        header = struct.pack('!BBQ', 0x81, 127, len(data))
+    return header + data
+
+
+class FakeApicHandler(BaseHTTPRequestHandler):
+    """
+    HTTP and WebSocket request handler of the fake APIC.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _login(self):
+        self._send_json({'imdata': [{'aaaLogin': {'attributes': {
+            'token': TOKEN, 'refreshTimeoutSeconds': '600',
+            'maximumLifetimeSeconds': '86400',
+        }}}]})
+
+    def _websocket(self):
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest())
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept.decode())
+        self.end_headers()
+        self.wfile.flush()
+
+        self.server.add_socket(self.wfile, self.connection)
+        try:
+            # Read the client frames until the close frame or EOF,
+            # the pushed messages are written by the server
+            while True:
+                header = self.rfile.read(2)
+                if len(header) < 2 or header[0] & 0x0f == 0x8:
+                    break
+                length = header[1] & 0x7f
+                if length == 126:
+                    length = struct.unpack('!H', self.rfile.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', self.rfile.read(8))[0]
+                # Mask key (4 bytes) and the payload are ignored
+                self.rfile.read(4 + length)
+        finally:
+            self.server.remove_socket(self.wfile)
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if urlsplit(self.path).path == '/api/aaaLogin.json':
+            return self._login()
+        self._send_json({'error': f'unknown resource {self.path}'}, 404)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path.startswith('/socket'):
+            return self._websocket()
+        if url.path == '/api/aaaRefresh.json':
+            return self._login()
+        if url.path == '/api/subscriptionRefresh.json':
+            if server.refresh(params.get('id')):
+                return self._send_json({'totalCount': '0', 'imdata': []})
+            return self._send_json({'error': 'unknown subscription'}, 400)
+        if url.path.startswith('/api/node/class/') and url.path.endswith('.json'):
+            mo_class = url.path[len('/api/node/class/'):-len('.json')]
+            response_json = server.query(mo_class, params.get('subscription') == 'yes')
+            return self._send_json(response_json)
+        self._send_json({'error': f'unknown resource {self.path}'}, 404)
+
+
+class FakeApic(ThreadingHTTPServer):
+    """
+    Fake APIC with the MO objects in memory and the event WebSocket.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, verbose=False):
+        super().__init__((host, port), FakeApicHandler)
+        self.verbose = verbose
+        self.objects = {}
+        self.subscriptions = {}
+        self._ids = itertools.count(1)
+        self._sockets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def add_socket(self, wfile, connection):
+        with self._lock:
+            self._sockets[wfile] = connection
+
+    def remove_socket(self, wfile):
+        with self._lock:
+            self._sockets.pop(wfile, None)
+
+    def query(self, mo_class, subscribe=False):
+        """
+        Return the class query response, with a new subscriptionId if
+        subscribe is True.
+        """
+        with self._lock:
+            imdata = [
+                {mo_class: {'attributes': dict(attributes)}}
+                for attributes in self.objects.get(mo_class, {}).values()
+            ]
+            response_json = {'totalCount': str(len(imdata)), 'imdata': imdata}
+            if subscribe:
+                subscription_id = str(next(self._ids))
+                self.subscriptions[subscription_id] = mo_class
+                response_json['subscriptionId'] = subscription_id
+        return response_json
+
+    def refresh(self, subscription_id):
+        with self._lock:
+            return subscription_id in self.subscriptions
+
+    def expire_subscriptions(self):
+        """
+        Drop all the subscriptions, as if they timed out.
+        """
+        with self._lock:
+            self.subscriptions.clear()
+
+    def drop_sockets(self):
+        """
+        Close all the WebSockets and drop the subscriptions.
+        """
+        with self._lock:
+            self.subscriptions.clear()
+            for connection in self._sockets.values():
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _push(self, mo_class, attributes):
+        with self._lock:
+            ids = [sid for sid, cls in self.subscriptions.items() if cls == mo_class]
+            if not ids:
+                return
+            frame = ws_frame(json.dumps({
+                'subscriptionId': ids,
+                'imdata': [{mo_class: {'attributes': attributes}}],
+            }))
+            for wfile in list(self._sockets):
+                try:
+                    wfile.write(frame)
+                    wfile.flush()
+                except OSError:
+                    self._sockets.pop(wfile, None)
+
+    def set(self, mo_class, attributes, push=True):
+        """
+        Create or modify the object and push the change (only the changed
+        attributes of a modified object, the same as the APIC).
+        """
+        with self._lock:
+            objects = self.objects.setdefault(mo_class, {})
+            current = objects.get(attributes['dn'])
+            if current is None:
+                status, delta = 'created', dict(attributes)
+                objects[attributes['dn']] = dict(attributes)
+            else:
+                status = 'modified'
+                delta = {key: value for key, value in attributes.items()
+                         if current.get(key) != value}
+                delta['dn'] = attributes['dn']
+                current.update(attributes)
+        if push:
+            self._push(mo_class, dict(delta, status=status))
+
+    def delete(self, mo_class, dn, push=True):
+        """
+        Delete the object and push the change.
+        """
+        with self._lock:
+            removed = self.objects.get(mo_class, {}).pop(dn, None)
+        if push and removed is not None:
+            self._push(mo_class, {'dn': dn, 'status': 'deleted'})
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Fake APIC with the event WebSocket')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    apic = FakeApic(port=args.port, verbose=True)
+    apic.set('fvTenant', {'dn': 'uni/tn-common', 'name': 'common', 'descr': ''})
+    print(f'Fake APIC listening on {apic.url}')
+    try:
+        apic.serve_forever()
+    except KeyboardInterrupt:
+        apic.server_close()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+This script will record the HTTP requests and responses made by any of the
+sample scripts into a fixture file, which can be replayed later by the local
+mock server (see mock_server.py) without access to the public sandboxes.
+
+All the scripts use the requests library. Every request made with
+requests.get(), requests.post() or a requests.Session() object goes through
+the requests.Session.send() method, so the recorder wraps that method and
+saves each request/response pair as one JSON line (NDJSON):
+{
+    "method": "GET",
+    "path": "/api/v0/organizations/549236/devices",
+    "query": "per_page=2",
+    "request_body": null,
+    "status": 200,
+    "headers": {"Content-Type": "application/json", "Link": "<...>; rel=next"},
+    "body": "[{\"name\": \"\", \"serial\": \"Q2EK-S3AA-BXFW\", ...}]"
+}
+
+The host name is not stored, so the same fixture can be served from any
+local address. The fixtures are appended to the file and the pages of one
+collection are merged by the mock server, so record each script only once
+into the same file.
+
+Usage:
+    python mock_recorder.py <fixture file> <script> [script arguments]
+
+Example:
+    python mock_recorder.py meraki.ndjson ../meraki/get_devices.py
+"""
+
+import os
+import sys
+import json
+import runpy
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+# Response headers which are stored in the fixture
+RECORDED_HEADERS = ['Content-Type', 'Link', 'ETag', 'Last-Modified', 'Retry-After']
+
+
+def to_fixture(response):
+    """
+    Convert the requests.Response object into the fixture dictionary.
+    """
+    url = urlsplit(response.request.url)
+    body = response.request.body
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    return {
+        'method': response.request.method,
+        'path': url.path,
+        'query': url.query,
+        'request_body': body,
+        'status': response.status_code,
+        'headers': {
+            name: response.headers[name]
+            for name in RECORDED_HEADERS if name in response.headers
+        },
+        'body': response.text,
+    }
+
+
+@contextmanager
+def record(file_name):
+    """
+    Context manager which appends every request/response pair made by the
+    requests library to the fixture file.
+    """
+    original_send = requests.Session.send
+    lock = threading.Lock()
+    fixture_file = open(file_name, 'a')
+
+    def send(session, request, **kwargs):
+        response = original_send(session, request, **kwargs)
+        with lock:
+            fixture_file.write(json.dumps(to_fixture(response)) + '\n')
+            fixture_file.flush()
+        return response
+
+    requests.Session.send = send
+    try:
+        yield
+    finally:
+        requests.Session.send = original_send
+        fixture_file.close()
+
+
+def run_script(script, args):
+    """
+    Run the script as if it was started from the command line.
+    The script directory is added to the sys.path, so the local imports
+    like "from apic_client import get_client" work.
+    """
+    script = os.path.abspath(script)
+    sys.argv = [script] + list(args)
+    sys.path.insert(0, os.path.dirname(script))
+    runpy.run_path(script, run_name='__main__')
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    with record(sys.argv[1]):
+        run_script(sys.argv[2], sys.argv[3:])
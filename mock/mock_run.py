@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+This script will run any of the sample scripts against the local mock
+server (see mock_server.py) instead of the public sandbox.
+
+The sandbox URLs are hard-coded in the scripts, e.g.
+https://sandboxapicdc.cisco.com or https://api.meraki.com, so the requests
+are redirected on the fly: the requests.Session.send() method is wrapped
+and the scheme and host of every URL are replaced with the mock server URL.
+The path and the query string are kept, so the mock server can find the
+matching fixture.
+
+The UCS scripts use the ucsmsdk library which doesn't use the requests
+library. For them the UcsHandle object is created with the mock server
+address instead of the UCS Manager address.
+
+Usage:
+    python mock_run.py <mock server URL> <script> [script arguments]
+
+Example:
+    python mock_server.py meraki.ndjson --port 8080 --page-size 2 &
+    python mock_run.py http://127.0.0.1:8080 ../meraki/get_devices.py
+"""
+
+import sys
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from mock_recorder import run_script
+
+
+def redirect_url(url, target):
+    """
+    Replace the scheme and host of the URL with the target ones.
+    """
+    url = urlsplit(url)
+    target = urlsplit(target)
+    return urlunsplit((target.scheme, target.netloc, url.path, url.query, url.fragment))
+
+
+@contextmanager
+def redirect(target):
+    """
+    Context manager which redirects all the requests made by the requests
+    and ucsmsdk libraries to the target URL.
+    """
+    original_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        request.url = redirect_url(request.url, target)
+        return original_send(session, request, **kwargs)
+
+    requests.Session.send = send
+
+    # ucsmsdk is optional, it's needed only by the UCS scripts
+    original_ucs_init = None
+    try:
+        from ucsmsdk.ucshandle import UcsHandle
+    except ImportError:
+        UcsHandle = None
+    if UcsHandle is not None:
+        original_ucs_init = UcsHandle.__init__
+        target_url = urlsplit(target)
+
+        def ucs_init(handle, ip, username, password, port=None, secure=None,
+                     *args, **kwargs):
+            original_ucs_init(
+                handle, target_url.hostname, username, password,
+                target_url.port, target_url.scheme == 'https', *args, **kwargs
+            )
+
+        UcsHandle.__init__ = ucs_init
+
+    try:
+        yield
+    finally:
+        requests.Session.send = original_send
+        if original_ucs_init is not None:
+            UcsHandle.__init__ = original_ucs_init
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    with redirect(sys.argv[1]):
+        run_script(sys.argv[2], sys.argv[3:])
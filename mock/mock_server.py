@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+
+"""
+Local mock HTTP server which replays the recorded fixtures
+(see mock_recorder.py) instead of the public sandboxes of the
+APIC, DNA Center, Meraki, NSO, SD-WAN and Webex APIs.
+
+Every fixture is matched by the HTTP method, the path and the query string.
+The paging parameters are ignored during the matching, because the server
+does the paging itself:
+  - APIC        page / page-size query parameters over the "imdata" list
+  - DNA Center  offset (starting with 1) / limit over the "response" list,
+                at most 500 objects are returned in one response
+  - Meraki      RFC5988 Link header over a JSON list, per_page (v0) or
+                perPage (v1) parameter
+  - Webex       RFC5988 Link header over the "items" list, max parameter
+The Link header pagination is used only if the --page-size option is set
+or the client asks for a page size.
+
+To make the environment closer to the real controllers the server can add
+latency to every response and inject errors (e.g. HTTP 500 or HTTP 429
+with the Retry-After header) with the given probability.
+
+With the --etag option the server adds the ETag header to the GET responses
+and answers the conditional requests (If-None-Match) with HTTP 304, which is
+used to test the HTTP cache (see common/http_cache.py).
+
+The server counts the requests and the bytes sent, which is used by the
+benchmark scripts.
+
+Usage:
+    python mock_server.py <fixture file> [--port 8080] [--latency 0.05]
+                          [--page-size 100] [--error-rate 0.01]
+                          [--error-status 429] [--etag]
+
+Then run any script against the server with mock_run.py:
+    python mock_run.py http://127.0.0.1:8080 ../meraki/get_devices.py
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Query parameters used for paging, ignored when matching the fixtures
+PAGING_PARAMS = {
+    'page', 'page-size', 'order-by', 'offset', 'limit',
+    'per_page', 'perPage', 'startingAfter', 'max', 'cursor',
+}
+
+# DNA Center returns at most this number of objects in one response
+DNA_MAX_LIMIT = 500
+
+
+def _match_query(query):
+    """
+    Return the query string without the paging parameters, sorted.
+    """
+    return urlencode(sorted(
+        (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+        if key not in PAGING_PARAMS
+    ))
+
+
+def _parse(body):
+    """
+    Return the parsed JSON body or None.
+    """
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def _merge_pages(first, second):
+    """
+    Append the objects of the second parsed page to the first one.
+    Only the JSON collections (list, "imdata", "response", "items") can be
+    merged, return False otherwise.
+    """
+    if isinstance(first, list) and isinstance(second, list):
+        first.extend(second)
+        return True
+    if isinstance(first, dict) and isinstance(second, dict):
+        for key in ('imdata', 'response', 'items'):
+            if isinstance(first.get(key), list) and isinstance(second.get(key), list):
+                first[key].extend(second[key])
+                return True
+    return False
+
+
+class Fixtures:
+    """
+    Collection of the request/response fixtures.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def add(self, method, path, body, status=200, headers=None, query='',
+            match_body=None):
+        """
+        Add one fixture. The body can be a string or any JSON serializable
+        object. The match_body string has to be part of the request body
+        for the fixture to match, which is used for the XML APIs where
+        the method is sent in the body.
+        """
+        headers = dict(headers or {})
+        if not isinstance(body, str):
+            body = json.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+        # The JSON body is parsed once here, the requests only slice it
+        entry = {
+            'status': status,
+            'headers': headers,
+            'body': body,
+            'data': _parse(body),
+            'query': _match_query(query),
+            'match_body': match_body,
+        }
+        entries = self._entries.setdefault((method.upper(), path.rstrip('/')), [])
+
+        # The recorded pages of one collection are merged into one fixture,
+        # the server splits them into pages again.
+        for existing in entries:
+            if (existing['query'], existing['match_body']) == (entry['query'], match_body):
+                if _merge_pages(existing['data'], entry['data']):
+                    # Serialized again only if it's needed, see find()
+                    existing['body'] = None
+                return
+        entries.append(entry)
+
+    def load(self, file_name):
+        """
+        Load the NDJSON fixture file recorded by mock_recorder.py.
+        """
+        with open(file_name) as fixture_file:
+            for line in fixture_file:
+                if not line.strip():
+                    continue
+                fixture = json.loads(line)
+                self.add(
+                    fixture['method'], fixture['path'], fixture['body'],
+                    fixture['status'], fixture['headers'], fixture['query']
+                )
+        return self
+
+    def find(self, method, path, query, request_body=''):
+        """
+        Return the best matching fixture or None.
+        The fixture with the same query is preferred over the one with
+        only the same path.
+        """
+        entries = self._entries.get((method.upper(), path.rstrip('/')), [])
+        entries = [
+            entry for entry in entries
+            if not entry['match_body'] or entry['match_body'] in request_body
+        ]
+        query = _match_query(query)
+        entry = next((entry for entry in entries if entry['query'] == query),
+                     entries[0] if entries else None)
+        if entry is not None and entry['body'] is None:
+            entry['body'] = json.dumps(entry['data'])
+        return entry
+
+
+def paginate(body, params, page_size, next_url):
+    """
+    Apply the paging of the controller API to the parsed JSON body.
+    Return the body of the page and the Link header value (or None).
+    """
+    # APIC: page / page-size
+    if isinstance(body, dict) and 'imdata' in body:
+        if 'page-size' in params:
+            size = int(params['page-size'])
+            page = int(params.get('page', 0))
+            body = dict(body, imdata=body['imdata'][page * size:(page + 1) * size])
+        return body, None
+
+    # DNA Center: offset (1-based) / limit
+    if isinstance(body, dict) and isinstance(body.get('response'), list):
+        offset = int(params.get('offset', 1)) - 1
+        limit = min(int(params.get('limit', DNA_MAX_LIMIT)), DNA_MAX_LIMIT)
+        return dict(body, response=body['response'][offset:offset + limit]), None
+
+    # Meraki: JSON list, Webex: "items" list, both use the Link header
+    if isinstance(body, list):
+        # per_page in the Meraki v0 API, perPage in v1
+        size_param = 'perPage' if 'perPage' in params else 'per_page'
+        items, cursor_param = body, 'startingAfter'
+    elif isinstance(body, dict) and isinstance(body.get('items'), list):
+        items, size_param, cursor_param = body['items'], 'max', 'cursor'
+    else:
+        return body, None
+
+    size = int(params.get(size_param, page_size or 0))
+    if not size:
+        return body, None
+    start = int(params.get(cursor_param, 0))
+    page = items[start:start + size]
+
+    link = None
+    if start + size < len(items):
+        next_params = dict(params, **{cursor_param: start + size})
+        link = f'<{next_url}?{urlencode(next_params)}>; rel="next"'
+
+    if isinstance(body, list):
+        return page, link
+    return dict(body, items=page), link
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    HTTP request handler which replays the fixtures.
+    """
+
+    # Keep-alive connections, the same as the real controllers
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are sent by two writes, with the Nagle
+    # algorithm every keep-alive response would wait for the delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, headers, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() not in ('content-length', 'transfer-encoding',
+                                    'content-encoding', 'connection'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+        self.server.count(len(data))
+
+    def _handle(self):
+        server = self.server
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        request_body = self.rfile.read(length).decode('utf-8', errors='replace')
+
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        # Error injection
+        if server.error_rate and random.random() < server.error_rate:
+            server.count_error()
+            headers = {'Content-Type': 'application/json'}
+            if server.error_status == 429:
+                headers['Retry-After'] = str(server.retry_after)
+            return self._send(
+                server.error_status, headers,
+                json.dumps({'error': 'injected error'})
+            )
+
+        fixture = server.fixtures.find(self.command, url.path, url.query, request_body)
+        if fixture is None:
+            return self._send(
+                404, {'Content-Type': 'application/json'},
+                json.dumps({'error': f'no fixture for {self.command} {self.path}'})
+            )
+
+        headers = dict(fixture['headers'])
+        body = fixture['body']
+
+        # The recorded Link header points to the real controller,
+        # the new one is created by the paging below.
+        headers.pop('Link', None)
+        if 'json' in headers.get('Content-Type', '') and fixture['data'] is not None:
+            params = dict(parse_qsl(url.query, keep_blank_values=True))
+            page, link = paginate(
+                fixture['data'], params, server.page_size,
+                server.url + url.path
+            )
+            body = json.dumps(page)
+            if link:
+                headers['Link'] = link
+
+        if server.etag and self.command == 'GET' and fixture['status'] == 200:
+            etag = '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, {'ETag': etag}, '')
+
+        self._send(fixture['status'], headers, body)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
+    do_HEAD = _handle
+
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Threaded mock HTTP server with configurable latency, paging and
+    error injection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fixtures, host='127.0.0.1', port=0, latency=0.0,
+                 jitter=0.0, page_size=0, error_rate=0.0, error_status=500,
+                 retry_after=1, etag=False, verbose=False):
+        super().__init__((host, port), MockHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.etag = etag
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def url(self):
+        """
+        Base URL of the server, e.g. http://127.0.0.1:8080
+        """
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, bytes_sent):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_sent'] += bytes_sent
+
+    def count_error(self):
+        with self._lock:
+            self.stats['errors_injected'] += 1
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'bytes_sent': 0, 'errors_injected': 0}
+
+    def start(self):
+        """
+        Serve the requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Replay the recorded fixtures')
+    parser.add_argument('fixtures', nargs='+', help='NDJSON fixture files')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='delay of every response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='max. random delay added to the latency')
+    parser.add_argument('--page-size', type=int, default=0,
+                        help='Link header page size for Meraki/Webex lists')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='probability of an injected error, 0.0 - 1.0')
+    parser.add_argument('--error-status', type=int, default=500,
+                        help='HTTP status code of the injected errors')
+    parser.add_argument('--etag', action='store_true',
+                        help='send ETag and answer If-None-Match with HTTP 304')
+    args = parser.parse_args()
+
+    fixtures = Fixtures()
+    for file_name in args.fixtures:
+        fixtures.load(file_name)
+
+    server = MockServer(
+        fixtures, port=args.port, latency=args.latency, jitter=args.jitter,
+        page_size=args.page_size, error_rate=args.error_rate,
+        error_status=args.error_status, etag=args.etag, verbose=True
+    )
+    print(f'Mock server listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
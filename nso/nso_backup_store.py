@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+
+"""
+This script will keep an incremental, versioned backup of the configuration
+of the devices managed by Cisco NSO.
+
+Saving the full configuration of every device every night (the output of
+get_device_config.py or nso_backup.py) writes the same data again and again,
+even though most of the devices didn't change at all.
+
+The BackupStore below:
+  - canonicalizes each configuration (JSON with sorted keys, one value per
+    line), so the same configuration always gives the same text, and hashes
+    it with SHA-256
+  - skips the device if the hash equals the hash of its last version
+  - stores a changed configuration as a zlib compressed delta (the lines
+    copied from the base version and the new lines) against the last full
+    snapshot of the device - the delta is anchored on the lines which occur
+    exactly once in both versions (the "patience" diff), so it takes linear
+    time even for the configuration of a device with 10k interfaces
+  - stores a full snapshot (zlib compressed) every "full_every" versions,
+    for the first version and whenever the delta wouldn't be smaller
+
+So any version is restored from one full snapshot and at most one delta.
+
+Store layout:
+<store dir>/<device name>/index.json       - list of the versions
+<store dir>/<device name>/000001.full.z    - full snapshot
+<store dir>/<device name>/000002.delta.z   - delta against 000001
+The device name is encoded the same way as the file names of nso_backup.py
+(e.g. "/" as "%2F"), so no device directory is outside the store.
+
+Example of the report:
+    2000 devices in 41.37s: 1962 unchanged, 35 delta, 3 full, 0 failed
+    412.7 MB of configurations, 0.9 MB written, store size 71.3 MB
+
+Usage:
+    python nso_backup_store.py backup --store nso_store
+    python nso_backup_store.py backup dist-rtr01 dist-rtr02 --store nso_store
+    python nso_backup_store.py history dist-rtr01 --store nso_store
+    python nso_backup_store.py restore dist-rtr01 --version 3 --store nso_store
+
+You can find the new DevNet NSO sandbox here
+https://devnetsandbox.cisco.com/RM/Diagram/Index/aa07cf66-b756-4424-99c1-4a93aa42c913?diagramType=Topology
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import bisect
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from nso_client import NsoClient, device_path
+from nso_backup import device_names, safe_name
+
+# A full snapshot is stored every FULL_EVERY versions
+FULL_EVERY = 10
+
+
+def canonicalize(config):
+    """
+    Return the canonical text of the configuration - JSON with sorted keys
+    and one value per line, so the deltas are small.
+    """
+    return json.dumps(config, sort_keys=True, indent=1, ensure_ascii=False) + '\n'
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    """
+    Return the (i, j) positions of the lines which occur exactly once in
+    both ranges, the longest run of them in the same order in both.
+    """
+    a_index = {}
+    for i in range(alo, ahi):
+        a_index[a[i]] = None if a[i] in a_index else i
+    b_index = {}
+    for j in range(blo, bhi):
+        b_index[b[j]] = None if b[j] in b_index else j
+    pairs = [
+        (a_index[line], j) for line, j in b_index.items()
+        if j is not None and a_index.get(line) is not None
+    ]
+    pairs.sort(key=lambda pair: pair[1])
+
+    # Longest increasing subsequence of the base positions (patience sorting)
+    tails, tail_pairs, previous = [], [], {}
+    for pair in pairs:
+        pile = bisect.bisect_left(tails, pair[0])
+        previous[pair] = tail_pairs[pile - 1] if pile else None
+        if pile == len(tails):
+            tails.append(pair[0])
+            tail_pairs.append(pair)
+        else:
+            tails[pile] = pair[0]
+            tail_pairs[pile] = pair
+    anchors = []
+    pair = tail_pairs[-1] if tail_pairs else None
+    while pair is not None:
+        anchors.append(pair)
+        pair = previous[pair]
+    return anchors[::-1]
+
+
+def _matching_blocks(a, b):
+    """
+    Return the sorted (i, j, n) blocks of the lines a[i:i+n] == b[j:j+n].
+    """
+    blocks = []
+    ranges = [(0, len(a), 0, len(b))]
+    while ranges:
+        alo, ahi, blo, bhi = ranges.pop()
+        start = alo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            blocks.append((start, blo - (alo - start), alo - start))
+        end = ahi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if ahi < end:
+            blocks.append((ahi, bhi, end - ahi))
+
+        # The ranges between the anchors are matched the same way, a range
+        # without any anchor is replaced as a whole
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        for i, j in anchors:
+            ranges.append((alo, i, blo, j))
+            blocks.append((i, j, 1))
+            alo, blo = i + 1, j + 1
+        if anchors:
+            ranges.append((alo, ahi, blo, bhi))
+    return sorted(blocks)
+
+
+def make_delta(base_lines, lines):
+    """
+    Return the delta which turns the base lines into the lines:
+    ["=", start, end] copies the base lines, ["+", [...]] adds new lines.
+    """
+    delta = []
+    position = 0
+    for i, j, n in _matching_blocks(base_lines, lines):
+        if j > position:
+            delta.append(['+', lines[position:j]])
+        if delta and delta[-1][0] == '=' and delta[-1][2] == i:
+            delta[-1][2] = i + n
+        else:
+            delta.append(['=', i, i + n])
+        position = j + n
+    if position < len(lines):
+        delta.append(['+', lines[position:]])
+    return delta
+
+
+def apply_delta(base_lines, delta):
+    lines = []
+    for op in delta:
+        if op[0] == '=':
+            lines.extend(base_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+
+class BackupStore:
+    """
+    Versioned configuration store with hashing and compressed deltas.
+    """
+
+    def __init__(self, directory='nso_store', full_every=FULL_EVERY):
+        self.directory = directory
+        self.full_every = full_every
+
+    def _device_dir(self, name):
+        # The names "." and ".." are encoded too, so every device has
+        # its own directory inside the store
+        return os.path.join(self.directory, safe_name(name))
+
+    def history(self, name):
+        """
+        Return the list of the stored versions of the device.
+        """
+        try:
+            with open(os.path.join(self._device_dir(name), 'index.json')) as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return []
+
+    def _write(self, path, data):
+        temp_name = path + '.tmp'
+        with open(temp_name, 'wb') as data_file:
+            data_file.write(data)
+        os.replace(temp_name, path)
+
+    def _read(self, name, version):
+        with open(os.path.join(self._device_dir(name), version['file']), 'rb') as data_file:
+            return zlib.decompress(data_file.read()).decode('utf-8')
+
+    def save(self, name, config):
+        """
+        Store the configuration of the device if it changed and return
+        the result, e.g. {"status": "delta", "version": 3, "bytes": 812}.
+        """
+        text = canonicalize(config)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        history = self.history(name)
+        if history and history[-1]['hash'] == digest:
+            return {'status': 'unchanged', 'version': history[-1]['version'],
+                    'bytes': 0, 'raw': len(text)}
+
+        number = history[-1]['version'] + 1 if history else 1
+        full = zlib.compress(text.encode('utf-8'), 9)
+        entry = {'version': number, 'time': time.time(), 'hash': digest,
+                 'kind': 'full', 'base': None, 'file': f'{number:06d}.full.z'}
+        data = full
+
+        last_full = next((v for v in reversed(history) if v['kind'] == 'full'), None)
+        if last_full and number - last_full['version'] < self.full_every:
+            base_lines = self._read(name, last_full).splitlines(keepends=True)
+            delta = make_delta(base_lines, text.splitlines(keepends=True))
+            compressed = zlib.compress(json.dumps(delta).encode('utf-8'), 9)
+            if len(compressed) < len(full):
+                entry.update(kind='delta', base=last_full['version'],
+                             file=f'{number:06d}.delta.z')
+                data = compressed
+
+        device_dir = self._device_dir(name)
+        os.makedirs(device_dir, exist_ok=True)
+        self._write(os.path.join(device_dir, entry['file']), data)
+        entry['size'] = len(data)
+        history.append(entry)
+        # The index is written last, so a broken run never points to
+        # a missing version file
+        self._write(os.path.join(device_dir, 'index.json'), json.dumps(history).encode())
+        return {'status': entry['kind'], 'version': number, 'bytes': len(data),
+                'raw': len(text)}
+
+    def restore(self, name, version=None):
+        """
+        Return the canonical text of the version (default: the last one).
+        Raise KeyError if the device or the version isn't in the store.
+        """
+        versions = {v['version']: v for v in self.history(name)}
+        if not versions:
+            raise KeyError(f'No backup of {name}')
+        if version is None:
+            version = max(versions)
+        if version not in versions:
+            raise KeyError(f'No version {version} of {name}, '
+                           f'the versions are {min(versions)} to {max(versions)}')
+        entry = versions[version]
+
+        if entry['kind'] == 'full':
+            return self._read(name, entry)
+        base_lines = self._read(name, versions[entry['base']]).splitlines(keepends=True)
+        delta = json.loads(self._read(name, entry))
+        return ''.join(apply_delta(base_lines, delta))
+
+    def size(self):
+        """
+        Return the size of all the files in the store in bytes.
+        """
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+
+def backup(client, store, names, workers=8):
+    """
+    Generator which reads the configurations concurrently, saves them into
+    the store and yields the (name, result, error) of each device.
+    """
+    def save(name):
+        return store.save(name, client.get(device_path(name) + '/config'))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # A name given twice would make two threads write one index.json
+        futures = {executor.submit(save, name): name for name in dict.fromkeys(names)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except (requests.RequestException, OSError, ValueError) as error:
+                yield futures[future], None, error
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Incremental backup of the NSO device configurations'
+    )
+    parser.add_argument('--store', default='nso_store', help='store directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = commands.add_parser('backup', help='back up the devices')
+    backup_parser.add_argument('devices', nargs='*',
+                               help='names of the devices, default: all devices')
+    backup_parser.add_argument('--group', help='back up the members of the device group')
+    backup_parser.add_argument('--workers', type=int, default=8,
+                               help='number of configurations read at the same time')
+    backup_parser.add_argument('--full-every', type=int, default=FULL_EVERY,
+                               help='store a full snapshot every N versions')
+
+    history_parser = commands.add_parser('history', help='list the versions')
+    history_parser.add_argument('device')
+
+    restore_parser = commands.add_parser('restore', help='print a version')
+    restore_parser.add_argument('device')
+    restore_parser.add_argument('--version', type=int,
+                                help='version number, default: the last one')
+    args = parser.parse_args()
+
+    if args.command == 'history':
+        for version in BackupStore(args.store).history(args.device):
+            print(f"{version['version']:>6}  {time.ctime(version['time'])}  "
+                  f"{version['kind']:<5}  {version['size']:>10} bytes  {version['hash'][:12]}")
+
+    elif args.command == 'restore':
+        start = time.perf_counter()
+        try:
+            text = BackupStore(args.store).restore(args.device, args.version)
+        except KeyError as error:
+            print(error.args[0], file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.write(text)
+        print(f'Restored in {time.perf_counter() - start:.3f}s', file=sys.stderr)
+
+    else:
+        store = BackupStore(args.store, args.full_every)
+        client = NsoClient(pool_size=args.workers)
+        names = list(dict.fromkeys(args.devices or device_names(client, args.group)))
+
+        start = time.perf_counter()
+        counts = {'unchanged': 0, 'delta': 0, 'full': 0, 'failed': 0}
+        raw_bytes = written_bytes = 0
+        for name, result, error in backup(client, store, names, args.workers):
+            if error:
+                counts['failed'] += 1
+                print(f'{name}: FAILED {error}', file=sys.stderr)
+                continue
+            counts[result['status']] += 1
+            raw_bytes += result['raw']
+            written_bytes += result['bytes']
+            print(f"{name}: {result['status']} v{result['version']} "
+                  f"{result['bytes']} bytes")
+        seconds = time.perf_counter() - start
+
+        print(f'{len(names)} devices in {seconds:.2f}s: ' +
+              ', '.join(f'{count} {status}' for status, count in counts.items()))
+        print(f'{raw_bytes / 1e6:.1f} MB of configurations, '
+              f'{written_bytes / 1e6:.1f} MB written, '
+              f'store size {store.size() / 1e6:.1f} MB')
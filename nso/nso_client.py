@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+Cisco NSO RESTCONF client with a pooled HTTP session and a query builder.
+
+The get_devices.py script reads the whole /restconf/data/tailf-ncs:devices
+resource, i.e. the authgroups, device groups with their alarm summaries
+and, for every device, the capabilities, the active settings and the full
+YANG library (modules-state). That is megabytes per call even if only the
+names and addresses of the devices are needed.
+
+RESTCONF (RFC 8040, section 4.8) defines query parameters which limit
+the data returned by the GET method:
+  depth    - number of levels of the data tree returned, 1 = only the
+             requested node, "unbounded" = everything (the default)
+  fields   - only the listed data nodes are returned, e.g.
+             device(name;address;state/admin-state)
+             ";" separates the nodes, "/" goes one level deeper and
+             "(...)" selects the nodes of each list entry
+  content  - "config" (configuration only), "nonconfig" (operational state
+             only) or "all" (the default)
+
+The query() function builds and checks these parameters, e.g.:
+    query(fields='device(name;address;state/admin-state)')
+    query(depth=3, content='config')
+    query(fields=['name', 'address', 'platform/version'])
+
+Example:
+    from nso_client import NsoClient, query
+    client = NsoClient()
+    devices = client.get(
+        '/data/tailf-ncs:devices',
+        params=query(fields='device(name;address;state/admin-state)')
+    )
+
+The session keeps the connections open (keep-alive) and can be shared by
+concurrent workers.
+
+You can find the new DevNet NSO sandbox here
+https://devnetsandbox.cisco.com/RM/Diagram/Index/aa07cf66-b756-4424-99c1-4a93aa42c913?diagramType=Topology
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# As we are working on a non-secured environment we can disable
+# security warnings related to self-signed SSL certificate.
+# Don't disable this in your production environment but rather
+# configure your systems properly and secure.
+from urllib3 import disable_warnings
+from urllib3.exceptions import InsecureRequestWarning
+disable_warnings(InsecureRequestWarning)
+
+
+# Sandbox users can directly access the NSO instance via public URL below:
+BASE_URL = "https://sandbox-nso-1.cisco.com/restconf"
+
+# RESTCONF resource with all devices
+DEVICES_PATH = '/data/tailf-ncs:devices'
+
+# Storing passwords inside your scripts is not recommended but for the demo
+# purposes it is the easiest way.
+# One recommended way is to export your credentials as an environment
+# variables and then use these variables in your script.
+#
+# Example:
+# import os
+# PASSWORD = os.getenv('MY_SECURE_PASSWORD')
+#
+# Here the environment variable is called 'MY_SECURE_PASSWORD' which
+# contains your secret password.
+USERNAME = 'developer'
+PASSWORD = 'Services4Ever'
+
+# Allowed values of the RESTCONF "content" query parameter
+CONTENT_VALUES = ('config', 'nonconfig', 'all')
+
+
+def query(depth=None, fields=None, content=None):
+    """
+    Return the RESTCONF query parameters. The fields can be a string or
+    a list of data nodes, which are joined with ";".
+    """
+    params = {}
+    if depth is not None:
+        if depth != 'unbounded' and (not isinstance(depth, int) or depth < 1):
+            raise ValueError(f'depth has to be "unbounded" or >= 1, not {depth!r}')
+        params['depth'] = str(depth)
+    if fields:
+        if not isinstance(fields, str):
+            fields = ';'.join(fields)
+        if fields.count('(') != fields.count(')'):
+            raise ValueError(f'unbalanced parentheses in fields {fields!r}')
+        params['fields'] = fields
+    if content is not None:
+        if content not in CONTENT_VALUES:
+            raise ValueError(f'content has to be one of {CONTENT_VALUES}, not {content!r}')
+        params['content'] = content
+    return params
+
+
+def device_path(name):
+    """
+    Return the RESTCONF path of the device list entry.
+    """
+    return f'{DEVICES_PATH}/device={requests.utils.quote(name, safe="")}'
+
+
+class NsoClient:
+    """
+    NSO RESTCONF client with a pooled keep-alive session.
+    """
+
+    def __init__(self, base_url=BASE_URL, username=USERNAME, password=PASSWORD,
+                 pool_size=10, verify=False):
+        self.base_url = base_url.rstrip('/')
+        self.verify = verify
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # requests generates a Basic Auth base 64 encoded value for us
+        self.session.auth = (username, password)
+
+        # Both XML and JSON data formats are supported.
+        # To use JSON data format we need to setup the headers with
+        # the 'application/yang-data+json' media type
+        self.session.headers.update({
+            'Content-Type': 'application/yang-data+json',
+            'Accept': 'application/yang-data+json',
+        })
+
+    def request(self, method, path, **kwargs):
+        """
+        Make the HTTP request and return the response object.
+        Raise an exception if the response is not OK.
+        """
+        url = path if path.startswith('http') else self.base_url + path
+        kwargs.setdefault('verify', self.verify)
+        response = self.session.request(method, url, **kwargs)
+
+        if not response.ok:
+            print(response.text)
+            response.raise_for_status()
+        return response
+
+    def get(self, path, **kwargs):
+        """
+        HTTP GET the RESTCONF resource and return the JSON data.
+        """
+        response = self.request('GET', path, **kwargs)
+        # HTTP 204 (No Content) is returned for an empty container
+        return response.json() if response.content else {}
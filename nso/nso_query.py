@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+This script will retrieve only the selected data of the devices managed by
+Cisco NSO via the RESTCONF depth, fields and content query parameters
+(see nso_client.py) and compare it with the full tailf-ncs:devices dump
+read by get_devices.py.
+
+Example of the filtered request:
+/restconf/data/tailf-ncs:devices?fields=device(name;address;state/admin-state)
+
+Example of returned data:
+{
+  "tailf-ncs:devices": {
+    "device": [
+      {
+        "name": "core-rtr01",
+        "address": "10.10.20.173",
+        "state": {
+          "admin-state": "unlocked"
+        }
+      },
+      ...
+    ]
+  }
+}
+
+With the --compare option the unfiltered request is sent as well and the
+payload size and the best latency of both requests (out of --repeat runs)
+are printed, e.g.:
+    unfiltered:      1843211 bytes in 2.913s
+    filtered:           1622 bytes in 0.184s
+    saved:      99.9% bytes, 93.7% time
+
+Usage:
+    python nso_query.py --fields "device(name;address;state/admin-state)"
+    python nso_query.py --depth 3 --content config --compare
+
+You can find the new DevNet NSO sandbox here
+https://devnetsandbox.cisco.com/RM/Diagram/Index/aa07cf66-b756-4424-99c1-4a93aa42c913?diagramType=Topology
+"""
+
+import sys
+import time
+import argparse
+
+from nso_client import NsoClient, query, DEVICES_PATH, CONTENT_VALUES
+
+
+def measure(client, path, params=None, repeat=1):
+    """
+    HTTP GET the resource repeat times and return the last response, its
+    size in bytes and the best latency in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.request('GET', path, params=params)
+        size = len(response.content)
+        latency = time.perf_counter() - start
+        best = latency if best is None else min(best, latency)
+    return response, size, best
+
+
+def depth_value(value):
+    return value if value == 'unbounded' else int(value)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Filtered RESTCONF query of the NSO devices'
+    )
+    parser.add_argument('--path', default=DEVICES_PATH,
+                        help='RESTCONF resource, default: %(default)s')
+    parser.add_argument('--fields', default='device(name;address;state/admin-state)',
+                        help='data nodes to return, default: %(default)s')
+    parser.add_argument('--depth', type=depth_value,
+                        help='number of levels returned or "unbounded"')
+    parser.add_argument('--content', choices=CONTENT_VALUES,
+                        help='config, nonconfig or all data')
+    parser.add_argument('--compare', action='store_true',
+                        help='compare with the unfiltered request')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of requests measured with --compare, '
+                             'the best latency is shown')
+    args = parser.parse_args()
+
+    client = NsoClient()
+    params = query(depth=args.depth, fields=args.fields, content=args.content)
+
+    # The unfiltered request goes first, so both requests use the same
+    # already open connection.
+    if args.compare:
+        _, full_size, full_time = measure(client, args.path, repeat=args.repeat)
+
+    repeat = args.repeat if args.compare else 1
+    response, size, latency = measure(client, args.path, params, repeat)
+    print(f"HTTP GET: {response.url}", file=sys.stderr)
+    print(response.text)
+
+    if args.compare:
+        print(f'unfiltered: {full_size:>12} bytes in {full_time:.3f}s', file=sys.stderr)
+        print(f'filtered:   {size:>12} bytes in {latency:.3f}s', file=sys.stderr)
+        print(f'saved:      {100 - 100 * size / max(full_size, 1):.1f}% bytes, '
+              f'{100 - 100 * latency / max(full_time, 1e-9):.1f}% time',
+              file=sys.stderr)
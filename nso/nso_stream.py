@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+This script will parse very large Cisco NSO RESTCONF responses
+incrementally, while they are still being received.
+
+The get_devices.py, get_services.py and get_device_config.py scripts print
+response.text, and any processing of the data would need response.json().
+Both read the whole body into memory first. A full device list or the
+configuration tree of a big device can be hundreds of MB.
+
+Here the response is read with stream=True and parsed by the ijson library
+chunk by chunk, so the memory stays bounded by the size of one chunk (or
+one list entry) and the processing starts with the first received bytes:
+  - iter_events() yields the (path, value) of every leaf, e.g.
+      ("tailf-ncs:devices.device.item.name", "core-rtr01")
+      ("tailf-ncs:devices.device.item.address", "10.10.20.173")
+    where "item" stands for one entry of a list
+  - iter_entries() yields the entries of one list one by one, e.g. every
+    device of tailf-ncs:devices.device or every loopbackdevnet service
+    instance, as complete Python objects
+
+The ijson library has to be installed, see requirements.txt.
+
+Usage:
+    python nso_stream.py devices > devices.ndjson
+    python nso_stream.py services
+    python nso_stream.py config --device dist-rtr01 --events
+
+You can find the new DevNet NSO sandbox here
+https://devnetsandbox.cisco.com/RM/Diagram/Index/aa07cf66-b756-4424-99c1-4a93aa42c913?diagramType=Topology
+"""
+
+import sys
+import json
+import argparse
+
+import ijson
+
+from nso_client import NsoClient, device_path, DEVICES_PATH
+
+# Resources with a large list: (RESTCONF path, ijson prefix of the list entries)
+LISTS = {
+    'devices': (DEVICES_PATH, 'tailf-ncs:devices.device.item'),
+    'services': ('/data/tailf-ncs:services',
+                 'tailf-ncs:services.loopbackdevnet:loopbackdevnet.item'),
+}
+
+# ijson events of the leaf values
+VALUE_EVENTS = {'string', 'number', 'boolean', 'null'}
+
+
+def _stream(client, path, params=None):
+    """
+    Return the streamed response with the body decoded (e.g. gzip).
+    """
+    response = client.request('GET', path, params=params, stream=True)
+    response.raw.decode_content = True
+    return response
+
+
+def iter_events(client, path, params=None):
+    """
+    Generator which yields the (path, value) of every leaf of the
+    RESTCONF resource as soon as it's parsed.
+    """
+    with _stream(client, path, params) as response:
+        for prefix, event, value in ijson.parse(response.raw, use_float=True):
+            if event in VALUE_EVENTS:
+                yield prefix, value
+
+
+def iter_entries(client, path, prefix, params=None):
+    """
+    Generator which yields the list entries at the ijson prefix, e.g.
+    "tailf-ncs:devices.device.item", one by one.
+    """
+    with _stream(client, path, params) as response:
+        yield from ijson.items(response.raw, prefix, use_float=True)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description='Parse large NSO RESTCONF responses incrementally'
+    )
+    parser.add_argument('resource', choices=list(LISTS) + ['config'],
+                        help='devices, services or config of one device')
+    parser.add_argument('--device', default='dist-rtr01',
+                        help='device of the config resource')
+    parser.add_argument('--events', action='store_true',
+                        help='print the (path, value) events instead of '
+                             'the list entries')
+    args = parser.parse_args()
+
+    client = NsoClient()
+    if args.resource == 'config':
+        path, prefix = device_path(args.device) + '/config', None
+    else:
+        path, prefix = LISTS[args.resource]
+
+    # Print one event or entry per line as soon as it's parsed
+    count = 0
+    if args.events or prefix is None:
+        for event in iter_events(client, path):
+            sys.stdout.write(json.dumps(event) + '\n')
+            count += 1
+    else:
+        for entry in iter_entries(client, path, prefix):
+            sys.stdout.write(json.dumps(entry) + '\n')
+            count += 1
+
+    print(f'{count} {"events" if args.events or prefix is None else "entries"} parsed',
+          file=sys.stderr)
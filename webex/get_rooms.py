@@ -64,13 +64,41 @@ Example output of a meeting room info:
 }
 """
 
+import os
+import sys
 import json
+import threading
 import requests
 
 # Get the Developer Access Token.
 # Token is stored inside the "dev_access_token" variable
 import webex_auth
 
+# import the HTTP cache from common/http_cache.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from http_cache import CachingAdapter, HttpCache  # noqa: E402
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the session shared by all the requests, create it on the first
+    call. The rooms barely change between the runs, so the GET responses
+    are kept in the on-disk HTTP cache (see common/http_cache.py). They are
+    downloaded again only if they changed or the cached copy is older than
+    the TTL.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            cache_adapter = CachingAdapter(HttpCache())
+            _session = requests.Session()
+            _session.mount('https://', cache_adapter)
+            _session.mount('http://', cache_adapter)
+        return _session
+
 
 def get_resource(**kwargs) -> dict:
     """
@@ -82,9 +110,10 @@ def get_resource(**kwargs) -> dict:
     response_json dictionary.
     """
 
-    response = requests.get(**kwargs)
+    response = get_session().get(**kwargs)
     print(f"HTTP {response.request.method}: {response.url}")
     print(f'HTTP Status code: {response.status_code}')
+    print(f"HTTP cache: {response.headers.get('X-Cache')}")
 
     # Raise an exception if the response is not OK
     if not response.ok: